@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+from collections import deque
+from random import Random
+from exact_metro import FlowNetwork, get_flow_costs, get_exact_turns
+
+# above this number of stations, betweenness is estimated from a sample of
+# source stations instead of all of them
+EXACT_BETWEENNESS_LIMIT = 2000
+SAMPLE_NUMBER = 256
+
+
+def get_graph(metro):
+    """
+    Get the undirected graph of the stations reachable from the start
+    station.
+
+        @param: metro: main Map object of program
+        @return: station_list: list of stations, a station is a node index
+        @return: adjacency: list of neighbour node indexes of every node
+    """
+    station_list = [metro.start_station]
+    node_dict = {metro.start_station.uid: 0}
+    adjacency = [set()]
+    queue = deque([metro.start_station])
+    while queue:
+        station = queue.popleft()
+        node = node_dict[station.uid]
+        for neighbour in metro.get_neighbours(station):
+            if neighbour.uid not in node_dict:
+                node_dict[neighbour.uid] = len(station_list)
+                station_list.append(neighbour)
+                adjacency.append(set())
+                queue.append(neighbour)
+            next_node = node_dict[neighbour.uid]
+            if next_node != node:
+                adjacency[node].add(next_node)
+                adjacency[next_node].add(node)
+    return station_list, [sorted(neighbours) for neighbours in adjacency]
+
+
+def find_min_cut(metro):
+    """
+    Find the maximum number of station-disjoint routes from start to end and
+    a minimum set of stations that every route goes through one of.
+
+        @param: metro: main Map object of program
+        @return: number of routes (int), list of stations of the cut
+    """
+    # the cut has to go through stations, not tracks
+    network = FlowNetwork(metro, track_capacity=metro.train_number)
+    route_number = 0
+    while network.augment() is not None:
+        route_number += 1
+    return route_number, network.get_min_cut()
+
+
+def find_articulation_points(adjacency, end):
+    """
+    Find the articulation points of the graph (Tarjan, iterative depth first
+    search from node 0, the start station) and the ones that every route
+    from start to end goes through.
+
+        @param: adjacency: list of neighbour node indexes of every node
+        @param: end: node of the end station (int)
+        @return: articulation_list: list of nodes
+        @return: separating_list: list of nodes, from start to end
+    """
+    discovery = [None] * len(adjacency)
+    low = [0] * len(adjacency)
+    parent = [None] * len(adjacency)
+    articulation = [False] * len(adjacency)
+    time = 0
+    discovery[0] = low[0] = time
+    root_children = 0
+    stack = [(0, iter(adjacency[0]))]
+    while stack:
+        node, neighbours = stack[-1]
+        for next_node in neighbours:
+            if discovery[next_node] is None:
+                time += 1
+                discovery[next_node] = low[next_node] = time
+                parent[next_node] = node
+                if node == 0:
+                    root_children += 1
+                stack.append((next_node, iter(adjacency[next_node])))
+                break
+            if next_node != parent[node]:
+                low[node] = min(low[node], discovery[next_node])
+        else:
+            stack.pop()
+            if stack:
+                up = stack[-1][0]
+                low[up] = min(low[up], low[node])
+                if up != 0 and low[node] >= discovery[up]:
+                    articulation[up] = True
+    articulation[0] = root_children > 1
+    # on the tree path from end to start, a node separates them if the
+    # subtree toward end can not go above it
+    separating_list = []
+    node = end
+    while discovery[node] is not None and parent[node] is not None:
+        up = parent[node]
+        if up != 0 and low[node] >= discovery[up]:
+            separating_list.append(up)
+        node = up
+    separating_list.reverse()
+    articulation_list = [node for node, value in enumerate(articulation)
+                         if value]
+    return articulation_list, separating_list
+
+
+def get_betweenness(adjacency, sample_number=None, seed=0):
+    """
+    Get the betweenness of every node (Brandes), from every source node or
+    estimated from sample_number random ones.
+
+        @param: adjacency: list of neighbour node indexes of every node
+        @param: sample_number: number of source nodes, all if None
+        @param: seed: seed of the random sample (int)
+        @return: betweenness: list of float, normalized to [0, 1]
+    """
+    node_number = len(adjacency)
+    betweenness = [0.0] * node_number
+    source_list = list(range(node_number))
+    if sample_number and sample_number < node_number:
+        source_list = Random(seed).sample(source_list, sample_number)
+    for source in source_list:
+        order = []
+        predecessors = [[] for _ in range(node_number)]
+        path_count = [0] * node_number
+        distance = [-1] * node_number
+        path_count[source] = 1
+        distance[source] = 0
+        queue = deque([source])
+        while queue:
+            node = queue.popleft()
+            order.append(node)
+            for next_node in adjacency[node]:
+                if distance[next_node] < 0:
+                    distance[next_node] = distance[node] + 1
+                    queue.append(next_node)
+                if distance[next_node] == distance[node] + 1:
+                    path_count[next_node] += path_count[node]
+                    predecessors[next_node].append(node)
+        dependency = [0.0] * node_number
+        for node in reversed(order):
+            for previous in predecessors[node]:
+                dependency[previous] += path_count[previous]\
+                    / path_count[node] * (1 + dependency[node])
+            if node != source:
+                betweenness[node] += dependency[node]
+    # every pair is counted from both ends, scale the sample to all sources
+    scale = len(source_list) * max(node_number - 2, 1)
+    if node_number > 2:
+        scale = scale * (node_number - 1) / node_number
+    return [value / scale for value in betweenness]
+
+
+def rank_capacity_gains(metro, station_list):
+    """
+    Get how many turns the exact schedule saves if a station could hold two
+    trains at a time.
+
+        @param: metro: main Map object of program
+        @param: station_list: stations to try
+        @return: total turns of the exact schedule (int), list of
+                 (station, total turns with more capacity), best first
+    """
+    total_turn = get_exact_turns(get_flow_costs(metro),
+                                 metro.train_number)[0]
+    gain_list = []
+    for station in station_list:
+        cost_list = get_flow_costs(metro, {station.uid: 2})
+        gain_list.append((station,
+                          get_exact_turns(cost_list, metro.train_number)[0]))
+    gain_list.sort(key=lambda item: item[1])
+    return total_turn, gain_list
+
+
+def print_analysis(metro, top=10):
+    """
+    Print the bottleneck report of the map: disjoint routes, minimum cut,
+    articulation points, stations with the highest betweenness and the
+    stations where more capacity saves the most turns.
+
+        @param: metro: main Map object of program
+        @param: top: number of stations printed by betweenness (int)
+    """
+    station_list, adjacency = get_graph(metro)
+    print('Stations:', len(station_list))
+    if metro.end_station not in station_list:
+        print('Disjoint routes: 0, no route from',
+              str(metro.start_station), 'to', str(metro.end_station) + '.')
+        return
+    end = station_list.index(metro.end_station)
+    route_number, cut_list = find_min_cut(metro)
+    articulation_list, separating_list =\
+        find_articulation_points(adjacency, end)
+    sample_number = None
+    if len(station_list) > EXACT_BETWEENNESS_LIMIT:
+        sample_number = SAMPLE_NUMBER
+    betweenness = get_betweenness(adjacency, sample_number)
+    print('Disjoint routes:', route_number)
+    cut = [str(station) for station in cut_list]
+    if metro.end_station in metro.get_neighbours(metro.start_station):
+        cut.append('direct track from start to end')
+    print('Min vertex cut:', ', '.join(cut))
+    print('Articulation points:', len(articulation_list))
+    print('Separating start and end:',
+          ', '.join(str(station_list[node]) for node in separating_list))
+    if sample_number:
+        print('Betweenness (estimated from', sample_number, 'stations):')
+    else:
+        print('Betweenness:')
+    ranking = sorted(range(len(station_list)),
+                     key=lambda node: (-betweenness[node], node))
+    for node in ranking[:top]:
+        print('    ' + str(station_list[node]),
+              '{:.4f}'.format(betweenness[node]))
+    candidate_list = list(cut_list)
+    for node in separating_list:
+        if station_list[node] not in candidate_list:
+            candidate_list.append(station_list[node])
+    total_turn, gain_list = rank_capacity_gains(metro, candidate_list)
+    print('Exact total turn:', total_turn)
+    print('With capacity 2 at:')
+    for station, turn in gain_list:
+        print('    ' + str(station), turn, '(' + str(turn - total_turn) + ')')
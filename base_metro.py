@@ -47,6 +47,8 @@ class Station:
         format: current line + station's index (str)
     @method: add_line(line_name): add line_name to line_list if not added yet
     """
+    __slots__ = ('index', 'name', 'line', 'line_list', 'busy',
+                 'alter_index', 'uid', 'transfer')
 
     def __init__(self, index, name, line):
         """
@@ -59,27 +61,33 @@ class Station:
                         belongs to (list)
             @attribute: busy: status of the station at present
                         (bool, default False)
-            @attribute: alter_station: the alternative station that
-                        considered the same at the current station in
-                        circular line (Station, default None)
+            @attribute: alter_index: the other index of the station if it
+                        is both the first and the last station of a circular
+                        line (int, default None)
+            @attribute: uid: integer id of the station in the map, set by
+                        the map (int, default None)
+            @attribute: transfer: transfer group of the station if it is a
+                        cross (Transfer, default None)
         """
         self.index = int(index)
         self.name = name
         self.line = line
         self.line_list = [str(self.line)]
         self.busy = False
-        self.alter_station = None
+        self.alter_index = None
+        self.uid = None
+        self.transfer = None
 
     def __str__(self):
         """
         Magic method, return the string representation of the station under
             format: station name + station's position. (str)
         """
-        if not self.alter_station:
+        if self.alter_index is None:
             return self.name + '(' + self.position() + ')'
         # else
-        return self.name + '(' + self.position() + '&'
-        + str(self.alter_station.index) + ')'
+        return self.name + '(' + self.position() + '&'\
+            + str(self.alter_index) + ')'
 
     def position(self):
         """
@@ -96,14 +104,29 @@ class Station:
         if line_name not in self.line_list:
             self.line_list.append(line_name)
 
-    def add_alter(self, alter_station):
-        '''
-        Add current station to the alternative station's alter_station
-        attribute and vice versa.
-            @param: alter_station: alternative station (Station)
-        '''
-        self.alter_station = alter_station
-        alter_station.alter_station = self
+
+class Transfer:
+    """
+    Hold the stations of a cross, shared by all of them.
+
+    @method: __init__: magic method, initialize the transfer group
+        @param and attribute: uid: integer id of the transfer group (int)
+        @param and attribute: name: name of the cross stations (str)
+    """
+    __slots__ = ('uid', 'name', 'station_dict')
+
+    def __init__(self, uid, name):
+        """
+        Init magic method, initialize the transfer group.
+
+            @param and attribute: uid: integer id of the transfer group (int)
+            @param and attribute: name: name of the cross stations (str)
+            @attribute: station_dict: a dictionary with keys are line names
+                        and values are the cross station on that line
+        """
+        self.uid = uid
+        self.name = name
+        self.station_dict = {}
 
 
 class Line:
@@ -118,6 +141,9 @@ class Line:
                           the station
     @method: print_stations : print all stations of the line, line by line
     @method: find_station   : find station base on value parameter
+    @method: fold_circle    : merge the first and last stations of a circular
+                              line into one station
+    @method: get_next_index : index of a station next to another one
     """
     def __init__(self, name, station_list=[]):
         """
@@ -125,9 +151,12 @@ class Line:
         (the line).
             @param and attribute: name: line name
             @param and attribute: station_list: list of station on the line
+            @attribute: circular: True if the line is a circle (bool, default
+                        False)
         """
         self.name = name
         self.station_list = station_list
+        self.circular = False
 
     def __str__(self):
         """
@@ -148,8 +177,43 @@ class Line:
             if station.name == value or station.position() == value or\
                station.index == value:
                 return station
+        # the last station of a circular line is the first one
+        last = self.station_list[0] if self.circular else None
+        if last and (last.alter_index == value or
+                     self.name + ':' + str(last.alter_index) == value):
+            return last
         return None
 
+    def fold_circle(self):
+        """
+        If the line is a circle (the first and last stations have the same
+        name), remove the last station and keep its index as the alter_index
+        of the first one, so that each station of the line has one node.
+        """
+        if len(self.station_list) < 2 or\
+           self.station_list[0].name != self.station_list[-1].name:
+            return
+        first = self.station_list[0]
+        last = self.station_list.pop()
+        first.alter_index = last.index
+        for line_name in last.line_list:
+            first.add_line(line_name)
+        self.circular = True
+
+    def get_next_index(self, index, step):
+        """
+        Return the index step stations away from index, going round a
+        circular line.
+
+            @param: index: index of the station (int)
+            @param: step: 1 or -1 (int)
+            @return: index (int)
+        """
+        if not self.circular:
+            return index + step
+        first = self.station_list[0].index
+        return (index + step - first) % len(self.station_list) + first
+
 
 class Path:
     """
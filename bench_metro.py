@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+import json
+import tracemalloc
+from argparse import ArgumentParser
+from os import listdir, path
+from time import perf_counter
+from exact_metro import get_exact_path_object_list, simulate_exact
+from map_metro import Map
+from read_input import analyze_all_data
+from run_metro import get_path_object_list, simulate
+
+ALGORITHMS = (1, 2, 3)
+TRAIN_NUMBERS = (1, 10, 100)
+# a run is slower than its baseline if it takes more than TOLERANCE times
+# longer and more than MIN_SLOWDOWN seconds more, to ignore the noise of
+# very short runs
+TOLERANCE = 0.5
+MIN_SLOWDOWN = 0.01
+# number of times the cases that look slower are measured again
+RETRY = 2
+
+
+def run_case(filename, train_number, algo):
+    """
+    Solve a map once: parse the file, search the paths and simulate the
+    trains until they all reach the end station.
+
+        @param: filename: map file
+        @param: train_number: number of trains, replaces TRAINS of the file
+        @param: algo: algorithm to run, 1, 2 or 3 (int)
+        @return: dictionary with the duration of every step (seconds) and
+                 the total turns
+    """
+    start_time = perf_counter()
+    line_list, cross_dictionary, special_data = analyze_all_data(filename)
+    special_data['TRAINS'] = train_number
+    parse_time = perf_counter()
+    metro = Map(line_list, special_data, cross_dictionary)
+    if algo == 3:
+        _, path_list = get_exact_path_object_list(metro)
+    else:
+        if algo == 2:
+            paths = metro.find_possible_paths()
+        else:
+            paths = metro.get_shortest_path()
+        path_list = get_path_object_list(metro, paths)
+    search_time = perf_counter()
+    if algo == 3:
+        turns = simulate_exact(path_list)
+    else:
+        turns = simulate(metro, path_list, changes_only=True)
+    total_turn = 0
+    for total_turn, _ in turns:
+        pass
+    end_time = perf_counter()
+    return {'parse': parse_time - start_time,
+            'search': search_time - parse_time,
+            'simulate': end_time - search_time,
+            'total_turn': total_turn}
+
+
+def measure(filename, train_number, algo, repeat):
+    """
+    Run a case repeat times and keep the fastest duration of every step,
+    then run it once more under tracemalloc for its peak memory.
+
+        @param: filename: map file
+        @param: train_number: number of trains (int)
+        @param: algo: algorithm to run (int)
+        @param: repeat: number of timed runs (int)
+        @return: result dictionary
+    """
+    result = None
+    for _ in range(repeat):
+        run = run_case(filename, train_number, algo)
+        if result is None:
+            result = run
+        for step in ('parse', 'search', 'simulate'):
+            result[step] = min(result[step], run[step])
+    tracemalloc.start()
+    run_case(filename, train_number, algo)
+    result['peak_memory'] = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    result['total'] = result['parse'] + result['search'] + result['simulate']
+    return result
+
+
+def find_slowdowns(result, previous):
+    """
+    Return the steps of a case that are slower than in the baseline.
+
+        @param: result: result dictionary of the case
+        @param: previous: result dictionary of the case in the baseline
+        @return: list of messages
+    """
+    message_list = []
+    for step in ('parse', 'search', 'simulate', 'total'):
+        if result[step] > previous[step] * (1 + TOLERANCE) and\
+           result[step] - previous[step] > MIN_SLOWDOWN:
+            message_list.append('{} {:.4f}s -> {:.4f}s'.format(
+                step, previous[step], result[step]))
+    return message_list
+
+
+def compare(results, baseline):
+    """
+    Compare results with a baseline.
+
+        @param: results: dictionary with keys are 'map|trains|algo' and
+                values are result dictionaries
+        @param: baseline: results of a previous run, same format
+        @return: list of messages, one for every total turn change and every
+                 slowdown
+    """
+    message_list = []
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+        previous = baseline[key]
+        if result['total_turn'] != previous['total_turn']:
+            message_list.append(key + ': total turn ' +
+                                str(previous['total_turn']) + ' -> ' +
+                                str(result['total_turn']))
+        for message in find_slowdowns(result, previous):
+            message_list.append(key + ': ' + message)
+    return message_list
+
+
+def take_bench_args():
+    """
+    Take and return the arguments of the benchmark.
+    """
+    parser = ArgumentParser(
+        description='Run every map of a directory with several numbers of\
+        trains and every algorithm, record the durations, total turns and\
+        peak memory and compare them with a baseline.')
+    parser.add_argument('directory', action='store', nargs='?',
+                        default='testcase', help='Directory of the maps.\
+                        Default testcase')
+    parser.add_argument('--trains', action='store', type=int, nargs='+',
+                        default=TRAIN_NUMBERS, help='Numbers of trains.\
+                        Default ' + ' '.join(map(str, TRAIN_NUMBERS)))
+    parser.add_argument('--algo', action='store', type=int, nargs='+',
+                        choices=ALGORITHMS, default=ALGORITHMS,
+                        help='Algorithms to run. Default all')
+    parser.add_argument('--repeat', action='store', type=int, default=5,
+                        help='Timed runs of every case, the fastest is\
+                        kept. Default 5')
+    parser.add_argument('--output', action='store',
+                        default='bench_results.json',
+                        help='Results file. Default bench_results.json')
+    parser.add_argument('--baseline', action='store',
+                        default='bench_baseline.json',
+                        help='Baseline file to compare with. Default\
+                        bench_baseline.json')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='Also write the results to the baseline file.')
+    return parser.parse_args()
+
+
+def main():
+    """
+    Run the benchmark, write the results and exit with status 1 if a total
+    turn changed or a step got slower than in the baseline.
+    """
+    args = take_bench_args()
+    baseline = None
+    if not args.save_baseline:
+        try:
+            with open(args.baseline, 'r') as baseline_file:
+                baseline = json.load(baseline_file)
+        except FileNotFoundError:
+            print('No baseline', args.baseline + '.')
+    results = {}
+    for name in sorted(listdir(args.directory)):
+        filename = path.join(args.directory, name)
+        for train_number in args.trains:
+            for algo in args.algo:
+                key = name + '|' + str(train_number) + '|' + str(algo)
+                results[key] = measure(filename, train_number, algo,
+                                       args.repeat)
+                print('{:40} {:5} turns {:8.4f}s {:10} bytes'.format(
+                    key, results[key]['total_turn'], results[key]['total'],
+                    results[key]['peak_memory']))
+    # timings are noisy: a slowdown has to show again when the case is
+    # measured later
+    for _ in range(RETRY):
+        for key, result in results.items():
+            if not baseline or key not in baseline or\
+               not find_slowdowns(result, baseline[key]):
+                continue
+            name, train_number, algo = key.split('|')
+            retry = measure(path.join(args.directory, name),
+                            int(train_number), int(algo), args.repeat)
+            for step in ('parse', 'search', 'simulate', 'total'):
+                result[step] = min(result[step], retry[step])
+    with open(args.output, 'w') as output:
+        json.dump(results, output, indent=1, sort_keys=True)
+    if args.save_baseline:
+        with open(args.baseline, 'w') as output:
+            json.dump(results, output, indent=1, sort_keys=True)
+        return
+    if baseline is None:
+        return
+    message_list = compare(results, baseline)
+    for message in message_list:
+        print(message)
+    if message_list:
+        exit(1)
+    print('No change against', args.baseline + '.')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+from collections import deque
+from base_metro import Train, Path
+from read_input import print_error_and_exit
+from run_metro import Changes, Move
+
+# Exact scheduling: a station holds at most one train and a track carries at
+# most one train per turn. The maximum number of trains that reach the end
+# station within T turns is the max flow of the time-expanded network
+# (station x turn), which is reached by sending one train per turn along
+# each path of a minimum cost static flow (Ford & Fulkerson). So the flow is
+# augmented one unit at a time on the map itself, and every horizon T is
+# answered from the costs of these augmentations.
+
+
+class FlowNetwork:
+    """
+    Residual network of the map, every station is split into an in node and
+    an out node linked by an arc of capacity 1 (unlimited for the start and
+    end stations), every move between two stations is an arc of capacity 1
+    and cost 1.
+
+    @method: __init__   : magic method, build the network reachable from
+                          the start station
+    @method: augment    : send one more unit of flow along a cheapest path
+    @method: get_min_cut: stations of a minimum cut of the maximum flow
+    @method: get_paths  : decompose the flow into paths of stations
+    """
+    def __init__(self, metro, capacity_dict=None, track_capacity=1):
+        """
+        Init magic method, build the network reachable from the start
+        station.
+
+            @param and attribute: metro: main Map object of program
+            @param: capacity_dict: a dictionary with keys are station uids
+                    and values are their capacity if not 1 (default None)
+            @param: track_capacity: capacity of every move but the one from
+                    start to end, always 1 (int, default 1)
+            @attribute: station_list: station of every node pair
+            @attribute: head, capacity, cost: arcs, an arc and its reverse
+                        arc are next to each other
+            @attribute: graph: list of arc ids leaving every node
+            @attribute: source, sink: out node of the start station and in
+                        node of the end station
+        """
+        self.metro = metro
+        self.station_list = []
+        self.head = []
+        self.capacity = []
+        self.cost = []
+        self.graph = []
+        node_dict = {}
+
+        def get_node(station):
+            """
+            Return the index of the station in station_list, adding it if
+            new.
+
+                @param: station: station object
+                @return: index (int)
+            """
+            if station.uid not in node_dict:
+                node_dict[station.uid] = len(self.station_list)
+                self.station_list.append(station)
+                self.graph += [[], []]
+                queue.append(station)
+            return node_dict[station.uid]
+
+        queue = deque()
+        start = get_node(metro.start_station)
+        end = get_node(metro.end_station)
+        while queue:
+            station = queue.popleft()
+            node = node_dict[station.uid]
+            if node in (start, end):
+                capacity = metro.train_number
+            else:
+                capacity = (capacity_dict or {}).get(station.uid, 1)
+            self.add_arc(2 * node, 2 * node + 1, capacity, 0)
+            for neighbour in self.metro.get_neighbours(station):
+                next_node = get_node(neighbour)
+                # a direct track from start to end still carries one
+                # train per turn
+                if (node, next_node) == (start, end):
+                    self.add_arc(2 * node + 1, 2 * next_node, 1, 1)
+                elif next_node != node:
+                    self.add_arc(2 * node + 1, 2 * next_node,
+                                 track_capacity, 1)
+        self.source = 2 * start + 1
+        self.sink = 2 * end
+
+    def add_arc(self, tail, head, capacity, cost):
+        """
+        Add an arc and its reverse arc to the network.
+
+            @param: tail, head: nodes of the arc (int)
+            @param: capacity: capacity of the arc (int)
+            @param: cost: cost of the arc (int)
+        """
+        self.graph[tail].append(len(self.head))
+        self.head.append(head)
+        self.capacity.append(capacity)
+        self.cost.append(cost)
+        self.graph[head].append(len(self.head))
+        self.head.append(tail)
+        self.capacity.append(0)
+        self.cost.append(-cost)
+
+    def augment(self):
+        """
+        Send one more unit of flow along a cheapest path of the residual
+        network (Bellman-Ford with a queue, the residual network has
+        negative arcs).
+
+            @return: cost of the path (int), None if there is no path
+        """
+        distance = [None] * len(self.graph)
+        previous_arc = [None] * len(self.graph)
+        in_queue = [False] * len(self.graph)
+        distance[self.source] = 0
+        queue = deque([self.source])
+        while queue:
+            node = queue.popleft()
+            in_queue[node] = False
+            for arc in self.graph[node]:
+                if not self.capacity[arc]:
+                    continue
+                head = self.head[arc]
+                new_distance = distance[node] + self.cost[arc]
+                if distance[head] is None or new_distance < distance[head]:
+                    distance[head] = new_distance
+                    previous_arc[head] = arc
+                    if not in_queue[head]:
+                        in_queue[head] = True
+                        queue.append(head)
+        if distance[self.sink] is None:
+            return None
+        node = self.sink
+        while node != self.source:
+            arc = previous_arc[node]
+            self.capacity[arc] -= 1
+            self.capacity[arc ^ 1] += 1
+            node = self.head[arc ^ 1]
+        return distance[self.sink]
+
+    def get_min_cut(self):
+        """
+        Get the stations of a minimum cut once the flow is maximum: the
+        stations whose in node can still be reached from the source in the
+        residual network but not their out node.
+
+            @return: list of stations
+        """
+        reached = [False] * len(self.graph)
+        reached[self.source] = True
+        queue = deque([self.source])
+        while queue:
+            node = queue.popleft()
+            for arc in self.graph[node]:
+                if self.capacity[arc] and not reached[self.head[arc]]:
+                    reached[self.head[arc]] = True
+                    queue.append(self.head[arc])
+        return [station for node, station in enumerate(self.station_list)
+                if reached[2 * node] and not reached[2 * node + 1]]
+
+    def get_paths(self):
+        """
+        Decompose the flow into paths of stations from start to end.
+
+            @return: path_list: list of station lists
+        """
+        # flow of a forward arc is the capacity of its reverse arc
+        flow = {arc: self.capacity[arc ^ 1]
+                for arc in range(0, len(self.head), 2)
+                if self.capacity[arc ^ 1] and self.cost[arc]}
+        path_list = []
+        while True:
+            path = [self.metro.start_station]
+            node = self.source
+            while node != self.sink:
+                arc = next((arc for arc in self.graph[node]
+                            if flow.get(arc)), None)
+                if arc is None:
+                    return path_list
+                flow[arc] -= 1
+                # go through the station to its out node
+                node = self.head[arc]
+                if node != self.sink:
+                    path.append(self.station_list[node // 2])
+                    node += 1
+            path.append(self.metro.end_station)
+            path_list.append(path)
+
+
+def get_flow_costs(metro, capacity_dict=None):
+    """
+    Get the total cost of the minimum cost flow of every value.
+
+        @param: metro: main Map object of program
+        @param: capacity_dict: capacity of the stations, see FlowNetwork
+        @return: cost_list: cost_list[k - 1] is the total length of the k
+                 shortest station-disjoint paths (list)
+    """
+    network = FlowNetwork(metro, capacity_dict)
+    cost_list = []
+    cost = network.augment()
+    while cost is not None and len(cost_list) < metro.train_number:
+        cost_list.append(cost + (cost_list[-1] if cost_list else 0))
+        cost = network.augment()
+    return cost_list
+
+
+def get_exact_turns(cost_list, train_number):
+    """
+    Return the minimum number of turns to bring train_number trains to the
+    end station, and the number of paths to use. Sending one train per turn
+    on k paths of total length C brings k * (T + 1) - C trains in T turns.
+
+        @param: cost_list: result of get_flow_costs
+        @param: train_number: number of trains (int)
+        @return: total turns (int), number of paths (int)
+    """
+    best = None
+    for path_number, cost in enumerate(cost_list, 1):
+        # smallest T with path_number * (T + 1) - cost >= train_number
+        turn = -(-(train_number + cost) // path_number) - 1
+        if best is None or turn < best[0]:
+            best = (turn, path_number)
+    return best
+
+
+def get_exact_max_trains(cost_list, turn_limit):
+    """
+    Return the largest number of trains that reach the end station within
+    turn_limit turns.
+
+        @param: cost_list: result of get_flow_costs
+        @param: turn_limit: maximum number of turns (int)
+        @return: number of trains (int)
+    """
+    train_number = 0
+    for path_number, cost in enumerate(cost_list, 1):
+        train_number = max(train_number,
+                           path_number * (turn_limit + 1) - cost)
+    return train_number
+
+
+def get_exact_path_object_list(metro):
+    """
+    Create the path object list of an optimal schedule: the paths of the
+    minimum cost flow, each with at most one train leaving per turn.
+
+        @param: metro: main Map object of program
+        @return: total turns (int), path_list: list of all paths
+    """
+    cost_list = get_flow_costs(metro)
+    if not cost_list:
+        print_error_and_exit('path')
+    total_turn, path_number = get_exact_turns(cost_list, metro.train_number)
+    network = FlowNetwork(metro)
+    for _ in range(path_number):
+        network.augment()
+    return total_turn, create_exact_path_objects(metro, network.get_paths(),
+                                                 total_turn)
+
+
+def create_exact_path_objects(metro, station_lists, total_turn):
+    """
+    Create the path objects of an exact schedule from its paths, each path
+    gets as many trains as can arrive within total_turn turns, shortest path
+    first.
+
+        @param: metro: main Map object of program
+        @param: station_lists: paths of the minimum cost flow (station lists)
+        @param: total_turn: total turns of the schedule (int)
+        @return: path_list: list of all paths
+    """
+    station_lists = sorted(station_lists, key=len)
+    path_list = []
+    order = 1
+    remain = metro.train_number
+    for index, station_list in enumerate(station_lists):
+        path = Path(index, station_list, len(station_list) - 1, 1)
+        path.train_number = min(remain, total_turn - path.cost + 1)
+        remain -= path.train_number
+        path.train_list = []
+        for _ in range(path.train_number):
+            path.train_list.append(Train(metro.start_station, order))
+            order += 1
+        path_list.append(path)
+    return path_list
+
+
+def simulate_exact(path_list):
+    """
+    Run the trains of an exact schedule turn by turn: on every path the
+    train number i of the path leaves the start station at turn i + 1.
+
+        @param: path_list: result of get_exact_path_object_list
+        @return: generator of Changes (turn, moves), like simulate
+    """
+    total_turn = 0
+    for path in path_list:
+        if path.train_number:
+            total_turn = max(total_turn, path.cost + path.train_number - 1)
+    for turn in range(1, total_turn + 1):
+        moves = []
+        for path in path_list:
+            for index, train in enumerate(path.train_list):
+                step = min(max(turn - index, 0), path.cost)
+                if path.station_list[step] != train.position:
+                    moves.append(Move(train.order, train.position,
+                                      path.station_list[step]))
+                    train.position = path.station_list[step]
+        yield Changes(turn, tuple(moves))
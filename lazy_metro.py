@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+from base_metro import Line, Station
+from map_metro import Map
+from read_input import print_error_and_exit, read_lines
+
+
+def index_network(filename):
+    """
+    Scan the map file once without creating any station: find where every
+    line is in the file, the lines of every cross station and the special
+    data.
+
+        @param: filename: map file
+        @return: sections: a dictionary with keys are line names and values
+                 are lists of (begin, end) byte offsets of their stations
+        @return: cross_dictionary: a dictionary with keys are station names
+                 and values are all lines according to station keys
+        @return: special_data: a dictionary with keys are start train,
+                 end train and number of train and values are their
+                 information accordingly
+    """
+
+    def add_cross(line_data):
+        """
+        Merge the lines of a cross station into cross_dictionary, in the
+        same order as analyze_single_line does.
+
+            @param: line_data: raw data of the cross station (str)
+        """
+        station_data, cross_line = line_data.split(':Conn: ')
+        name = station_data.split(':')[1]
+        line_names = [current_line]
+        if cross_line != current_line:
+            line_names.append(cross_line)
+        for line_name in cross_dictionary.get(name, []):
+            if line_name not in line_names:
+                line_names.append(line_name)
+        cross_dictionary[name] = line_names
+
+    sections = {}
+    cross_dictionary = {}
+    special_data = {}
+    current_line = None
+    begin = 0
+    try:
+        with open(filename, 'rb') as fd:
+            for offset, next_offset, line_data in read_lines(fd):
+                # only the lines that the index needs are decoded
+                if line_data.startswith(b'#'):
+                    if current_line is not None:
+                        sections[current_line].append((begin, offset))
+                    current_line = line_data[1:].decode()
+                    sections.setdefault(current_line, [])
+                    begin = next_offset
+                elif b'=' in line_data:
+                    if current_line is not None and not special_data:
+                        sections[current_line].append((begin, offset))
+                    key, value = line_data.decode().split('=')
+                    special_data[key] = value
+                elif b':Conn:' in line_data:
+                    add_cross(line_data.decode())
+    except FileNotFoundError:
+        print_error_and_exit('file')
+    except PermissionError:
+        print_error_and_exit('permission')
+    except IsADirectoryError:
+        print_error_and_exit('dir')
+    except (UnicodeDecodeError, ValueError, IndexError):
+        print_error_and_exit('data')
+    # check if final data is valid
+    if not sections or len(special_data) != 3:
+        print_error_and_exit('data')
+    return sections, cross_dictionary, special_data
+
+
+class LazyMap(Map):
+    """
+    Map that only parses the lines of the start and end stations at first,
+    the other lines are parsed when the search reaches them through a cross
+    station.
+
+    @method: __init__     : magic method, index the map file
+    @method: set_init_data: load the lines of the start and end stations
+                            before setting them
+    @method: load_line    : parse all the lines with a given name
+    @method: get_line     : find line object by line name, load it if needed
+    """
+    def __init__(self, filename):
+        """
+        Init magic method, index the map file then initialize the map with
+        the lines of the start and end stations only.
+
+            @param and attribute: filename: map file
+            @attribute: sections: byte offsets of the lines not loaded yet
+        """
+        self.filename = filename
+        self.sections, cross_dictionary, special_data =\
+            index_network(filename)
+        Map.__init__(self, [], special_data, cross_dictionary)
+
+    def set_init_data(self, special_data):
+        """
+        Load the lines of the start and end stations, then set values for
+        start & end station and number of trains.
+
+            @param: special_data: start train, end train and number of train
+        """
+        for key in ('START', 'END'):
+            self.load_line(special_data.get(key, '').rpartition(':')[0])
+        Map.set_init_data(self, special_data)
+
+    def load_line(self, line_name):
+        """
+        Parse all the lines named line_name and add them to line_list.
+
+            @param: line_name: name of the line
+        """
+        if line_name not in self.sections:
+            return
+        try:
+            with open(self.filename, 'rb') as fd:
+                for begin, end in self.sections.pop(line_name):
+                    fd.seek(begin)
+                    line = Line(line_name)
+                    line.station_list = []
+                    for line_data in fd.read(end - begin).decode()\
+                            .splitlines():
+                        if line_data:
+                            line.station_list.append(
+                                self.create_station(line_data, line))
+                    if not line.station_list:
+                        continue
+                    # if line is circle, keep a single station for the
+                    # first and last.
+                    line.fold_circle()
+                    self.add_line(line)
+        except (OSError, UnicodeDecodeError, ValueError):
+            print_error_and_exit('data')
+
+    def create_station(self, line_data, line):
+        """
+        Create station object from its raw data.
+
+            @param: line_data: raw data of the station (str)
+            @param: line: line of the station (Line)
+            @return: station object
+        """
+        line_data = line_data.split(':Conn: ')[0]
+        index, name = line_data.split(':')
+        station = Station(index, name, line)
+        if name in self.cross_dictionary:
+            station.line_list = self.cross_dictionary[name]
+        return station
+
+    def get_line(self, line_name):
+        """
+        Find line object by line name, parse the line if not loaded yet.
+
+            @param: name: name of line
+            @return: line object if found, else None
+        """
+        self.load_line(line_name)
+        return Map.get_line(self, line_name)
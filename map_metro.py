@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 from sys import stderr
+from base_metro import Transfer
 from read_input import print_error_and_exit
 
 
@@ -13,6 +14,17 @@ class Map:
         @param and attribute: cross_dictionary: a dictionary with keys are
                               station names and values are all lines according
                               to station keys
+        @attribute: line_dict: a dictionary with keys are line names and
+                    values are the first line with that name
+        @attribute: transfer_dict: a dictionary with keys are cross names and
+                    values are their transfer group (Transfer)
+        @attribute: station_number: number of stations added, the next
+                    station uid
+        @attribute: ignored: flags of ignored stations, by station uid
+        @attribute: neighbour_dict: a dictionary with keys are station uids
+                    and values are their neighbours, see get_neighbours
+        @attribute: ignored_transfers: flags of ignored transfer groups, by
+                    transfer uid
     """
     def __init__(self, line_list, special_data, cross_dictionary):
         """
@@ -28,12 +40,21 @@ class Map:
                               station names and values are all lines according
                               to station keys
         """
-        self.line_list = line_list
+        self.line_list = []
+        self.line_dict = {}
         self.cross_dictionary = cross_dictionary
+        self.transfer_dict = {}
         self.start_station = None
         self.end_station = None
         self.train_number = 0
-        self.ignore_stations = []
+        self.station_number = 0
+        self.ignored = bytearray()
+        self.ignored_transfers = bytearray()
+        self.neighbour_dict = {}
+        # canonical order: the lines sorted by name, so that the station ids
+        # and the search do not depend on the order of the lines in the file
+        for line in sorted(line_list, key=lambda line: line.name):
+            self.add_line(line)
         # set values for start & end station, number of trains
         self.set_init_data(special_data)
         self.possible_paths = []
@@ -82,22 +103,45 @@ class Map:
                or not self.end_station:
                 print_error_and_exit('data')
             # check if the start point is the same as end point
-            if self.start_station == self.end_station\
-               or self.start_station == self.end_station.alter_station:
+            if self.start_station == self.end_station:
                 print_error_and_exit('end')
 
         def set_ignore_data():
             """
             Set data that need to be ignored.
             """
-            self.ignore_stations = [self.start_station]
-            if self.start_station.alter_station:
-                self.ignore_stations.append(self.start_station.alter_station)
+            self.ignored[self.start_station.uid] = 1
 
         set_start_data()
         check_valid_data()
         set_ignore_data()
 
+    def add_line(self, line):
+        """
+        Add a line to the map, give an integer id to each of its stations and
+        add its cross stations to their transfer group.
+
+            @param: line: line object
+        """
+        self.line_list.append(line)
+        if line.name not in self.line_dict:
+            self.line_dict[line.name] = line
+        for station in line.station_list:
+            station.uid = self.station_number
+            self.station_number += 1
+            self.ignored.append(0)
+            if station.name not in self.cross_dictionary:
+                continue
+            if station.name not in self.transfer_dict:
+                self.transfer_dict[station.name] =\
+                    Transfer(len(self.ignored_transfers), station.name)
+                self.ignored_transfers.append(0)
+            station.transfer = self.transfer_dict[station.name]
+            station.line_list.sort()
+            # like find_station, keep the first station of the first line
+            if line is self.line_dict[line.name]:
+                station.transfer.station_dict.setdefault(line.name, station)
+
     def get_line(self, line_name):
         """
         Find line object by line name.
@@ -105,10 +149,22 @@ class Map:
             @param: name: name of line
             @return: line object if found, else None
         """
-        for line in self.line_list:
-            if line.name == line_name:
-                return line
-        return None
+        return self.line_dict.get(line_name)
+
+    def is_ignored(self, station):
+        """
+        Check if a station is ignored, itself or through its transfer group.
+        The end station never is, it holds any number of trains.
+
+            @param: station: station object
+            @return: True or False
+        """
+        if station == self.end_station:
+            return False
+        if self.ignored[station.uid]:
+            return True
+        return bool(station.transfer and
+                    self.ignored_transfers[station.transfer.uid])
 
     def get_near_station_pairs(self, station, checked_stations={}):
         """
@@ -119,86 +175,44 @@ class Map:
                     empty list
             @return: near_station_list: list of near station
         """
-        def get_next_station_pair(index):
-            """
-            Get next station pair, add to next_station_list.
-
-                @param: index: index of the station (int)
-            """
-            next_index = [index+1, index-1]
-            for idx in next_index:
-                try:
-                    next_station = line.find_station(idx)
-                except AttributeError:
-                    pass
-                if next_station and next_station not in checked_station_list:
-                    near_station_list.append([next_station, station])
+        near_station_list = []
+        for next_station in self.get_neighbours(station):
+            if next_station not in checked_stations\
+               and not self.is_ignored(next_station):
+                near_station_list.append([next_station, station])
+        return near_station_list
 
-        def find_cross_stations():
-            """
-            Find cross stations and insert to next_station_list (prioritize).
+    def get_neighbours(self, station):
+        """
+        Get all stations one move away from a station: the same cross on
+        the other lines (the one on the destination line first), then the
+        next stations on its line. The order only depends on the station and
+        the end station, so it is computed once per station and kept.
 
-                @return: next_station_list: list of next stations
-            """
-            next_station_list = []
+            @param: station: current station
+            @return: neighbour_list: list of stations, must not be modified
+        """
+        if station.uid in self.neighbour_dict:
+            return self.neighbour_dict[station.uid]
+        neighbour_list = []
+        if station.transfer:
             for line_name in station.line_list:
-                try:
-                    line = self.get_line(line_name)
-                    next_station = line.find_station(station.name)
-                except AttributeError:
-                    pass
-                # if not found, move to next line
-                if not next_station:
+                line = self.get_line(line_name)
+                cross = station.transfer.station_dict.get(line_name)
+                if not line or not cross or cross == station:
                     continue
-                # if found, priority station in the destination line
+                # priority station in the destination line
                 elif line == self.end_station.line:
-                    next_station_list.insert(0, next_station)
-                # add other stations
+                    neighbour_list.insert(0, cross)
                 else:
-                    next_station_list.append(next_station)
-            return next_station_list
-
-        def add_cross_pairs():
-            """
-            Add cross pairs to near_station_list if not in checked_station_list
-
-                @return: near_station_list: list of near stations
-            """
-            for next_station in next_station_list:
-                if next_station not in checked_station_list:
-                    near_station_list.append([next_station, station])
-            return near_station_list
-
-        def find_in_line_stations():
-            """
-            Find station stations in a line.
-
-                @return: near_station_list: list of near stations
-            """
-            try:
-                in_line_station = line.find_station(station.position())
-            except AttributeError:
-                pass
-            # find next normal pairs
-            get_next_station_pair(in_line_station.index)
-            # if line is circle
-            if in_line_station.alter_station:
-                get_next_station_pair(in_line_station.alter_station.index)
-            return near_station_list
-
-        near_station_list = []
-        checked_station_list = [key for key in checked_stations.keys()]
-        checked_station_list += self.ignore_stations
-        # if station is a cross
-        if station.name in self.cross_dictionary:
-            next_station_list = find_cross_stations()
-            if next_station_list:
-                near_station_list = add_cross_pairs()
-
-        # find in line station
-        line = station.line
-        near_station_list = find_in_line_stations()
-        return near_station_list
+                    neighbour_list.append(cross)
+        for step in (1, -1):
+            next_station = station.line.find_station(
+                station.line.get_next_index(station.index, step))
+            if next_station and next_station != station:
+                neighbour_list.append(next_station)
+        self.neighbour_dict[station.uid] = neighbour_list
+        return neighbour_list
 
     def breadth_first_search(self, start, end):
         """
@@ -222,7 +236,7 @@ class Map:
             while queue:
                 station, pre_station = queue.pop(0)
                 checked_stations[station] = pre_station
-                if station == end or station == end.alter_station:
+                if station == end:
                     break
                 queue += self.get_near_station_pairs(station, checked_stations)
             return checked_stations
@@ -238,12 +252,9 @@ class Map:
                 @return: path: path from start to end, default value is empty
                               list
             """
-            while start != end and start != end.alter_station:
+            while start != end:
                 path.append(end)
-                try:
-                    end = checked_stations[end]
-                except KeyError:
-                    end = checked_stations[end.alter_station]
+                end = checked_stations[end]
             return path
 
         def get_bfs_path():
@@ -254,8 +265,7 @@ class Map:
             """
             path = []
             # find path and add to list, from end to start
-            if end in checked_stations or end.alter_station in\
-               checked_stations:
+            if end in checked_stations:
                 path = get_path_from_dict(start, end)
                 # add start station to list
                 path.append(start)
@@ -283,13 +293,8 @@ class Map:
             """
             if station == self.end_station or station == self.start_station:
                 return
-            for line_name in station.line_list:
-                line = self.get_line(line_name)
-                if not line:
-                    continue
-                cross = line.find_station(station.name)
-                if cross not in self.ignore_stations:
-                    self.ignore_stations.append(cross)
+            if station.transfer:
+                self.ignored_transfers[station.transfer.uid] = 1
 
         def add_next_to_path():
             """
@@ -317,8 +322,8 @@ class Map:
             Add all the stations except first and last one to ignore list.
             '''
             for station in min_path[1:-1]:
-                if station not in self.ignore_stations:
-                    self.ignore_stations.append(station)
+                if not self.ignored[station.uid]:
+                    self.ignored[station.uid] = 1
                     ignore_cross(station)
 
         # find all possible stations that next to the start station
@@ -328,8 +333,7 @@ class Map:
             for station_pair in near_stations:
                 # if start next to end, add it to path and continue to
                 # next pair.
-                if self.end_station in station_pair or\
-                   self.end_station.alter_station in station_pair:
+                if self.end_station in station_pair:
                     add_next_to_path()
                     continue
                 # do BFS for all the other stations that next to the
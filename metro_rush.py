@@ -1,36 +1,193 @@
 #!/usr/bin/env python3
 
+import json
+from sys import argv, stderr
+from analyze_metro import print_analysis
+from exact_metro import get_flow_costs, get_exact_turns,\
+    get_exact_max_trains, get_exact_path_object_list, simulate_exact
+from lazy_metro import LazyMap
 from map_metro import Map
-from read_input import analyze_all_data, take_input_args
-from run_metro import get_path_object_list, get_all_train, move_the_train,\
-    print_train, check_if_all_train_arrived_end
+from plan_metro import sweep_turns, find_max_trains, predict_turns,\
+    get_plan_fingerprint, get_network_fingerprint, Timetable,\
+    create_timetable, simulate_timetable
+from read_input import analyze_all_data, take_input_args,\
+    take_verify_args, print_error_and_exit
+from output_metro import SINKS, write_turns
+from run_metro import get_path_object_list, simulate, split_train,\
+    simulate_bounded
+from verify_metro import verify_schedule, ScheduleError
 
 
 def main():
     """
     This is main function of this project.
     """
-    filename, algo = take_input_args()
-    line_list, cross_dictionary, special_data = analyze_all_data(filename)
+    if argv[1:2] == ['verify']:
+        verify()
+        return
+    args = take_input_args()
+    if args.serve is not None:
+        # only the server needs asyncio, keep it out of normal runs
+        from server_metro import run_server
+        run_server(args.filename, args.host, args.serve)
+        return
     # create metro map
-    metro = Map(line_list, special_data, cross_dictionary)
+    if args.lazy:
+        metro = LazyMap(args.filename)
+    else:
+        line_list, cross_dictionary, special_data =\
+            analyze_all_data(args.filename)
+        metro = Map(line_list, special_data, cross_dictionary)
+    if args.analyze:
+        print_analysis(metro)
+        return
+    if args.algo == 'auto':
+        run_race(args, metro)
+        return
+    if args.algo == 3:
+        run_exact(args, metro)
+        return
+    if args.timetable:
+        run_timetable(args, metro)
+        return
     # choose algorithm to run and print
-    if algo == 2:
-        path_list = get_path_object_list(metro, metro.find_possible_paths())
+    if args.algo == 2:
+        paths = metro.find_possible_paths()
     # if algo = 1
     else:
-        path_list = get_path_object_list(metro, metro.get_shortest_path())
-
-    all_train = get_all_train(path_list)
-
-    i = 0
-    while not check_if_all_train_arrived_end(metro, all_train):
-        i += 1
-        print('Turn:', i)
-        path_list = move_the_train(path_list, metro)
-        all_train = get_all_train(path_list)
-        print_train(all_train, metro)
-    print('Total turn:', i)
+        paths = metro.get_shortest_path()
+    if args.sweep:
+        for train_number, total_turn in sweep_turns(
+                paths, metro.cross_dictionary, *args.sweep):
+            print('Trains:', train_number, 'Total turn:', total_turn)
+        return
+    if args.max_trains is not None:
+        print('Max trains:', find_max_trains(paths, metro.cross_dictionary,
+                                             args.max_trains))
+        return
+    if args.bounded:
+        path_list = split_train(metro.train_number, paths,
+                                metro.cross_dictionary)
+        sink = SINKS[args.format](metro, path_list)
+        write_turns(sink, simulate_bounded(metro, path_list))
+        return
+    path_list = get_path_object_list(metro, paths)
+    if args.fingerprint:
+        print('Fingerprint:', get_plan_fingerprint(path_list,
+                                                   predict_turns(path_list)))
+        return
+    sink = SINKS[args.format](metro, path_list)
+    write_turns(sink, simulate(metro, path_list, changes_only=True))
+
+
+def run_exact(args, metro):
+    """
+    Run the exact scheduler and print its result.
+
+        @param: args: arguments from input
+        @param: metro: main Map object of program
+    """
+    if args.sweep or args.max_trains is not None:
+        metro.train_number = max(args.sweep or [args.max_trains + 1])
+        cost_list = get_flow_costs(metro)
+        if args.max_trains is not None:
+            print('Max trains:',
+                  get_exact_max_trains(cost_list, args.max_trains))
+            return
+        if not cost_list:
+            print_error_and_exit('path')
+        first, last = args.sweep
+        for train_number in range(first, last + 1):
+            print('Trains:', train_number, 'Total turn:',
+                  get_exact_turns(cost_list, train_number)[0])
+        return
+    total_turn, path_list = get_exact_path_object_list(metro)
+    if args.fingerprint:
+        print('Fingerprint:', get_plan_fingerprint(path_list, total_turn))
+        return
+    sink = SINKS[args.format](metro, path_list)
+    write_turns(sink, simulate_exact(path_list))
+
+
+def run_timetable(args, metro):
+    """
+    Print the plan of a saved timetable, search the paths and save their
+    timetable first if there is none for the lines of the map, the algorithm
+    and the start and end stations.
+
+        @param: args: arguments from input
+        @param: metro: main Map object of program
+    """
+    network = get_network_fingerprint(args.filename)
+    timetable = None
+    try:
+        with open(args.timetable, 'r') as fd:
+            timetable = Timetable(**json.load(fd))
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError, TypeError):
+        print_error_and_exit('data')
+    if not timetable or not timetable.fits(network, args.algo, metro):
+        if args.algo == 2:
+            paths = metro.find_possible_paths()
+        else:
+            paths = metro.get_shortest_path()
+        if not any(paths):
+            print_error_and_exit('path')
+        timetable = create_timetable(metro, paths, network, args.algo)
+        try:
+            with open(args.timetable, 'w') as fd:
+                json.dump(timetable.to_dict(), fd)
+        except OSError:
+            print_error_and_exit('permission')
+    path_list = timetable.get_path_object_list(metro)
+    if args.fingerprint:
+        print('Fingerprint:', get_plan_fingerprint(path_list,
+                                                   predict_turns(path_list)))
+        return
+    sink = SINKS[args.format](metro, path_list)
+    write_turns(sink, simulate_timetable(timetable, path_list))
+
+
+def run_race(args, metro):
+    """
+    Race all the algorithms and print the plan of the winner.
+
+        @param: args: arguments from input
+        @param: metro: main Map object of program
+    """
+    # only the race needs multiprocessing, keep it out of normal runs
+    from race_metro import race
+    algo, total_turn, path_list = race(args.filename, metro)
+    if args.fingerprint:
+        print('Fingerprint:', get_plan_fingerprint(path_list, total_turn))
+        return
+    sink = SINKS[args.format](metro, path_list)
+    if algo == 3:
+        write_turns(sink, simulate_exact(path_list))
+    else:
+        write_turns(sink, simulate(metro, path_list, changes_only=True))
+
+
+def verify():
+    """
+    Check a printed schedule against its map, exit with status 1 if it is
+    not valid.
+    """
+    args = take_verify_args()
+    line_list, cross_dictionary, special_data =\
+        analyze_all_data(args.filename)
+    metro = Map(line_list, special_data, cross_dictionary)
+    try:
+        with open(args.schedule, 'r') as schedule:
+            total_turn = verify_schedule(metro, schedule)
+    except (OSError, UnicodeDecodeError):
+        print_error_and_exit('file')
+    except ScheduleError as error:
+        print(error, file=stderr)
+        exit(1)
+    print('Valid schedule:', metro.train_number, 'trains,', total_turn,
+          'turns.')
 
 
 if __name__ == '__main__':
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+import json
+from struct import Struct
+from sys import stdout
+from run_metro import get_all_train, print_train
+
+# first field of the last record of the binary format
+END_RECORD = 0xFFFFFFFF
+
+
+class TextSink:
+    """
+    Print every turn in the human format of print_train.
+
+    @method: __init__  : magic method, initialize the sink
+    @method: write_turn: print the state after a turn
+    @method: close     : print the total turns
+    """
+    def __init__(self, metro, path_list):
+        """
+        Init magic method, initialize the sink.
+
+            @param and attribute: metro: main Map object of program
+            @param: path_list: list of all paths with their trains
+            @attribute: all_train: list of all trains
+        """
+        self.metro = metro
+        self.all_train = get_all_train(path_list)
+
+    def write_turn(self, turn, moves):
+        """
+        Print the state after a turn.
+
+            @param: turn: number of the turn (int)
+            @param: moves: trains that moved during the turn (tuple of Move)
+        """
+        print('Turn:', turn)
+        print_train(self.all_train, self.metro)
+
+    def close(self, total_turn):
+        """
+        Print the total turns.
+
+            @param: total_turn: number of turns (int)
+        """
+        print('Total turn:', total_turn)
+
+
+class JsonlSink:
+    """
+    Write one JSON object per line: a header with the station names indexed
+    by station uid, then the moves of every turn as [train, station uid]
+    pairs, then the total turns.
+
+    @method: __init__  : magic method, write the header
+    @method: write_turn: write the moves of a turn
+    @method: close     : write the total turns
+    """
+    def __init__(self, metro, path_list, stream=stdout):
+        """
+        Init magic method, write the header.
+
+            @param: metro: main Map object of program
+            @param: path_list: list of all paths with their trains
+            @param and attribute: stream: text stream to write to
+        """
+        self.stream = stream
+        self.write({'stations': get_station_names(metro),
+                    'trains': metro.train_number,
+                    'start': metro.start_station.uid,
+                    'end': metro.end_station.uid})
+
+    def write(self, record):
+        """
+        Write a record as a JSON line.
+        """
+        self.stream.write(json.dumps(record, separators=(',', ':')) + '\n')
+
+    def write_turn(self, turn, moves):
+        """
+        Write the moves of a turn.
+
+            @param: turn: number of the turn (int)
+            @param: moves: trains that moved during the turn (tuple of Move)
+        """
+        self.write({'turn': turn,
+                    'moves': [[move.train, move.target.uid]
+                              for move in moves]})
+
+    def close(self, total_turn):
+        """
+        Write the total turns.
+
+            @param: total_turn: number of turns (int)
+        """
+        self.write({'total_turn': total_turn})
+        self.stream.flush()
+
+
+class BinarySink:
+    """
+    Write little endian binary records: the header 'MRSH', the number of
+    stations, trains, start uid and end uid (4 x uint32), every station
+    name as uint16 length + UTF-8 bytes in uid order, then fixed-width
+    records of 2 x uint32: (0, turn) starts a turn, (train, station uid) is
+    a move of the turn and (END_RECORD, total turns) ends the output.
+
+    @method: __init__  : magic method, write the header
+    @method: write_turn: write the moves of a turn
+    @method: close     : write the total turns
+    """
+    header = Struct('<4sIIII')
+    name_length = Struct('<H')
+    record = Struct('<II')
+
+    def __init__(self, metro, path_list, stream=None):
+        """
+        Init magic method, write the header.
+
+            @param: metro: main Map object of program
+            @param: path_list: list of all paths with their trains
+            @param and attribute: stream: binary stream to write to
+                                  (default standard output)
+        """
+        self.stream = stream or stdout.buffer
+        name_list = get_station_names(metro)
+        self.stream.write(self.header.pack(b'MRSH', len(name_list),
+                                           metro.train_number,
+                                           metro.start_station.uid,
+                                           metro.end_station.uid))
+        for name in name_list:
+            name = name.encode()
+            self.stream.write(self.name_length.pack(len(name)) + name)
+
+    def write_turn(self, turn, moves):
+        """
+        Write the moves of a turn.
+
+            @param: turn: number of the turn (int)
+            @param: moves: trains that moved during the turn (tuple of Move)
+        """
+        pack = self.record.pack
+        self.stream.write(pack(0, turn) + b''.join(
+            pack(move.train, move.target.uid) for move in moves))
+
+    def close(self, total_turn):
+        """
+        Write the total turns.
+
+            @param: total_turn: number of turns (int)
+        """
+        self.stream.write(self.record.pack(END_RECORD, total_turn))
+        self.stream.flush()
+
+
+# sink class of every output format
+SINKS = {'text': TextSink, 'jsonl': JsonlSink, 'bin': BinarySink}
+
+
+def get_station_names(metro):
+    """
+    Return the printed name of every station of the map, by station uid.
+
+        @param: metro: main Map object of program
+        @return: name_list: list of str
+    """
+    name_list = [None] * metro.station_number
+    for line in metro.line_list:
+        for station in line.station_list:
+            name_list[station.uid] = str(station)
+    return name_list
+
+
+def write_turns(sink, turns):
+    """
+    Write every turn of a simulation to a sink, then the total turns.
+
+        @param: sink: TextSink, JsonlSink or BinarySink
+        @param: turns: generator of Changes (turn, moves)
+    """
+    total_turn = 0
+    for total_turn, moves in turns:
+        sink.write_turn(total_turn, moves)
+    sink.close(total_turn)
@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+from hashlib import sha256
+from base_metro import Path, Train
+from read_input import print_error_and_exit, read_lines
+from run_metro import Changes, Move, create_path_objects, add_train,\
+    split_train, find_delta
+
+
+def get_headway(path):
+    """
+    Return the number of turns between two trains leaving the start station
+    on a path: a train only leaves once the one before it is two stations
+    ahead, unless the next station is already the end station.
+
+        @param: path: Path object
+        @return: int
+    """
+    if len(path.station_list) == 2:
+        return 1
+    return 2
+
+
+def predict_turns(path_object_list):
+    """
+    Return the total turns the simulation takes to bring all the trains to
+    the end station, without running it.
+
+        @param: path_object_list: list of Path objects with their number of
+                trains
+        @return: total turns (int)
+    """
+    total_turn = 0
+    for path in path_object_list:
+        if path.train_number:
+            turn = len(path.station_list) - 1\
+                + get_headway(path) * (path.train_number - 1)
+            total_turn = max(total_turn, turn)
+    return total_turn
+
+
+def sweep_turns(path_list, cross_dictionary, first, last):
+    """
+    Get the total turns for every number of trains from first to last, the
+    trains are split once more for each number instead of from scratch.
+
+        @param: path_list: list of all paths from start to end
+        @param: cross_dictionary: a dictionary with keys are station names and
+                                  values are all lines according to
+                                  station keys
+        @param: first: first number of trains (int)
+        @param: last: last number of trains (int)
+        @return: generator of (number of trains, total turns), exit if there
+                 is no path
+    """
+    if not any(path_list):
+        print_error_and_exit('path')
+    path_object_list = create_path_objects(path_list, cross_dictionary)
+    for train_number in range(1, last + 1):
+        add_train(path_object_list)
+        if train_number >= first:
+            yield train_number, predict_turns(path_object_list)
+
+
+def find_max_trains(path_list, cross_dictionary, turn_limit):
+    """
+    Find the largest number of trains that all reach the end station within
+    turn_limit turns, by binary search on the number of trains.
+
+        @param: path_list: list of all paths from start to end
+        @param: cross_dictionary: a dictionary with keys are station names and
+                                  values are all lines according to
+                                  station keys
+        @param: turn_limit: maximum number of turns (int)
+        @return: number of trains (int), 0 if not even one train can
+    """
+    def fits(train_number):
+        """
+        Check if train_number trains reach the end within turn_limit.
+        """
+        return predict_turns(split_train(train_number, path_list,
+                                         cross_dictionary)) <= turn_limit
+
+    if not any(path_list) or not fits(1):
+        return 0
+    # double the upper bound until it does not fit any more
+    low, high = 1, 2
+    while fits(high):
+        low, high = high, high * 2
+    # low always fits, high never fits
+    while high - low > 1:
+        middle = (low + high) // 2
+        if fits(middle):
+            low = middle
+        else:
+            high = middle
+    return low
+
+
+def get_plan_fingerprint(path_object_list, total_turn):
+    """
+    Return a stable fingerprint of a plan: its paths (station positions),
+    the number of trains of every path and the total turns. Two runs with
+    the same fingerprint print the same schedule, whatever the order the
+    paths were found in.
+
+        @param: path_object_list: list of Path objects with their number of
+                trains
+        @param: total_turn: number of turns (int)
+        @return: fingerprint (str, hexadecimal sha256)
+    """
+    plan = sorted('-'.join(station.position()
+                           for station in path.station_list)
+                  + '=' + str(path.train_number)
+                  for path in path_object_list)
+    plan.append('turns=' + str(total_turn))
+    return sha256('\n'.join(plan).encode()).hexdigest()
+
+
+def get_station_lists(metro, paths):
+    """
+    Find back the stations of paths given by their positions, exit with an
+    error if a position is not a station of the map.
+
+        @param: metro: main Map object of program
+        @param: paths: lists of station positions, ex: 'Red Line:8'
+        @return: list of station lists
+    """
+    station_lists = []
+    for path in paths:
+        station_list = []
+        for position in path:
+            line_name, _, index = position.rpartition(':')
+            line = metro.get_line(line_name)
+            try:
+                station = line and line.find_station(int(index))
+            except ValueError:
+                station = None
+            # the positions do not belong to this map
+            if not station:
+                print_error_and_exit('data')
+            station_list.append(station)
+        station_lists.append(station_list)
+    return station_lists
+
+
+class Timetable:
+    """
+    Dispatch timetable of the paths between a start and an end station, for
+    any number of trains: on a path, train j (from 0) leaves the start
+    station at turn 1 + headway * j and reaches the end station at turn
+    length + headway * j. The trains are split between the paths like
+    split_train does, but without giving them one by one.
+
+    @method: __init__           : magic method, initialize the timetable
+    @method: to_dict            : return the timetable as a dictionary that
+                                  json can write
+    @method: fits               : check that the timetable was made for a
+                                  map, algorithm and start and end stations
+    @method: get_departure      : turn a train leaves the start station
+    @method: get_arrival        : turn a train reaches the end station
+    @method: get_rank           : order of a path among the paths with the
+                                  same cost in split_train
+    @method: split              : number of trains of every path
+    @method: get_path_object_list: path objects with their trains
+    """
+    def __init__(self, network, algo, start, end, paths, deltas):
+        """
+        Init magic method, initialize the timetable.
+
+            @param and attribute: network: fingerprint of the lines of the
+                                  map, see get_network_fingerprint
+            @param and attribute: algo: algorithm that found the paths (int)
+            @param and attribute: start, end: positions of the start and end
+                                  stations, ex: 'Red Line:8'
+            @param and attribute: paths: station positions of every path, in
+                                  the order the search found them
+            @param and attribute: deltas: cost of a train on every path, see
+                                  find_delta
+            @attribute: lengths: number of moves of every path
+            @attribute: headways: turns between two trains of every path
+        """
+        self.network = network
+        self.algo = algo
+        self.start = start
+        self.end = end
+        self.paths = paths
+        self.deltas = deltas
+        self.lengths = [len(path) - 1 for path in paths]
+        self.headways = [1 if length == 1 else 2 for length in self.lengths]
+
+    def to_dict(self):
+        """
+        Return the timetable as a dictionary that json can write, the
+        arguments of Timetable.
+        """
+        return {'network': self.network, 'algo': self.algo,
+                'start': self.start, 'end': self.end, 'paths': self.paths,
+                'deltas': self.deltas}
+
+    def fits(self, network, algo, metro):
+        """
+        Check that the timetable was made for the same lines, algorithm and
+        start and end stations, and that it has paths.
+
+            @param: network: fingerprint of the lines of the map
+            @param: algo: algorithm to run (int)
+            @param: metro: main Map object of program
+            @return: bool
+        """
+        return any(self.paths) and\
+            (self.network, self.algo, self.start, self.end) ==\
+            (network, algo, metro.start_station.position(),
+             metro.end_station.position())
+
+    def get_departure(self, index, train):
+        """
+        Return the turn the train number train (from 0) of the path number
+        index leaves the start station.
+        """
+        return 1 + self.headways[index] * train
+
+    def get_arrival(self, index, train):
+        """
+        Return the turn the train number train (from 0) of the path number
+        index reaches the end station.
+        """
+        return self.lengths[index] + self.headways[index] * train
+
+    def get_rank(self, index, cost):
+        """
+        Return the order of a path among the paths with the same cost in
+        split_train. A path that gets a train goes first among the paths of
+        its new cost (the sort is stable and it was first), so at a cost:
+        the paths that reached it from a higher cost before it (smaller
+        delta) go first, and the paths of the same delta come in the reverse
+        order of the cost below, which unrolls into an odd or even number k
+        of trains since then. The paths without train go last, in index
+        order.
+
+            @param: index: index of the path (int)
+            @param: cost: cost of the path, its length + k * delta (int)
+            @return: sort key (tuple)
+        """
+        delta = self.deltas[index]
+        k = (cost - self.lengths[index]) // delta
+        if not k:
+            return (1, 0, 0, index)
+        if k % 2:
+            return (0, delta, 0, k, -index)
+        return (0, delta, 1, -k, index)
+
+    def split(self, train_number):
+        """
+        Split the trains between the paths like split_train: a path gets a
+        train at every cost length + k * delta, the lowest costs first, so
+        the last cost given is found by binary search on the number of costs
+        below a value, then the paths of this cost are taken by rank.
+
+            @param: train_number: number of trains (int)
+            @return: train_numbers: number of trains of every path
+            @return: order: path indexes in the order of the path list of
+                     split_train
+        """
+        path_number = len(self.paths)
+        if not train_number or not path_number:
+            return [0] * path_number, list(range(path_number))
+
+        def count(cost):
+            """
+            Return the number of trains given at a cost lower or equal to
+            cost.
+            """
+            return sum((cost - length) // delta + 1
+                       for length, delta in zip(self.lengths, self.deltas)
+                       if cost >= length)
+
+        # the shortest path alone gives enough trains below high
+        low = min(self.lengths)
+        high = low + max(self.deltas) * train_number
+        while low < high:
+            middle = (low + high) // 2
+            if count(middle) >= train_number:
+                high = middle
+            else:
+                low = middle + 1
+        remain = train_number - count(low - 1)
+        train_numbers = [max((low - 1 - length) // delta + 1, 0)
+                         for length, delta in zip(self.lengths, self.deltas)]
+        tie_list = sorted((index for index in range(path_number)
+                           if low >= self.lengths[index] and
+                           not (low - self.lengths[index])
+                           % self.deltas[index]),
+                          key=lambda index: self.get_rank(index, low))
+        for index in tie_list[:remain]:
+            train_numbers[index] += 1
+        # the path list is sorted before the last train is given
+        costs = [length + delta * number for length, delta, number
+                 in zip(self.lengths, self.deltas, train_numbers)]
+        costs[tie_list[remain - 1]] = low
+        order = sorted(range(path_number),
+                       key=lambda index: (costs[index],
+                                          self.get_rank(index,
+                                                        costs[index])))
+        return train_numbers, order
+
+    def get_path_object_list(self, metro):
+        """
+        Create the path object list of the number of trains of the map, like
+        get_path_object_list of run_metro without searching the paths and
+        giving the trains one by one.
+
+            @param: metro: main Map object of program
+            @return: path_list: list of all paths
+        """
+        train_numbers, order = self.split(metro.train_number)
+        station_lists = get_station_lists(metro, self.paths)
+        path_list = []
+        train_order = 1
+        for index in order:
+            path = Path(index, station_lists[index], self.lengths[index]
+                        + self.deltas[index] * train_numbers[index],
+                        self.deltas[index])
+            path.train_number = train_numbers[index]
+            path.train_list = []
+            for _ in range(path.train_number):
+                path.train_list.append(Train(metro.start_station,
+                                             train_order))
+                train_order += 1
+            path_list.append(path)
+        return path_list
+
+
+def get_network_fingerprint(filename):
+    """
+    Return the fingerprint of the lines of a map file: every line of the
+    file but the special data (start, end and number of trains), that
+    changes between runs with the same paths.
+
+        @param: filename: map file
+        @return: fingerprint (str, hexadecimal sha256)
+    """
+    digest = sha256()
+    try:
+        with open(filename, 'rb') as fd:
+            for _, _, line_data in read_lines(fd):
+                if line_data and b'=' not in line_data:
+                    digest.update(line_data + b'\n')
+    except OSError:
+        print_error_and_exit('file')
+    return digest.hexdigest()
+
+
+def create_timetable(metro, path_list, network, algo):
+    """
+    Create the timetable of the paths found by a search.
+
+        @param: metro: main Map object of program
+        @param: path_list: list of all paths from start to end
+        @param: network: fingerprint of the lines of the map
+        @param: algo: algorithm that found the paths (int)
+        @return: Timetable object
+    """
+    return Timetable(network, algo, metro.start_station.position(),
+                     metro.end_station.position(),
+                     [[station.position() for station in path]
+                      for path in path_list],
+                     [find_delta(path, metro.cross_dictionary)
+                      for path in path_list])
+
+
+def simulate_timetable(timetable, path_list):
+    """
+    Run the trains of a timetable turn by turn, every train moves at every
+    turn from its departure to its arrival.
+
+        @param: timetable: Timetable object
+        @param: path_list: result of Timetable.get_path_object_list
+        @return: generator of Changes (turn, moves), like simulate
+    """
+    total_turn = 0
+    for path in path_list:
+        if path.train_number:
+            total_turn = max(total_turn, timetable.get_arrival(
+                path.index, path.train_number - 1))
+    for turn in range(1, total_turn + 1):
+        moves = []
+        for path in path_list:
+            for train_index, train in enumerate(path.train_list):
+                step = turn + 1 - timetable.get_departure(path.index,
+                                                          train_index)
+                step = min(max(step, 0), timetable.lengths[path.index])
+                if path.station_list[step] != train.position:
+                    moves.append(Move(train.order, train.position,
+                                      path.station_list[step]))
+                    train.position = path.station_list[step]
+        yield Changes(turn, tuple(moves))
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+from collections import deque
+from multiprocessing import Pool
+from queue import SimpleQueue
+from exact_metro import get_exact_path_object_list, create_exact_path_objects
+from map_metro import Map
+from plan_metro import predict_turns, get_station_lists
+from read_input import print_error_and_exit
+from run_metro import split_train, get_path_object_list
+import worker_metro
+
+# strategies raced by --algo auto, the first one wins a tie
+STRATEGIES = (2, 1, 3)
+
+
+def run_strategy(algo):
+    """
+    Find the paths of an algorithm on the loaded network and predict its
+    total turns, run in a worker process.
+
+        @param: algo: algorithm to run, 1, 2 or 3 (int)
+        @return: algo, total turns (int) and the paths as lists of station
+                 positions
+        @raise: ValueError: the algorithm finds no path
+    """
+    line_list, cross_dictionary, special_data = worker_metro.network
+    metro = Map(line_list, special_data, cross_dictionary)
+    if algo == 3:
+        total_turn, path_list = get_exact_path_object_list(metro)
+        paths = [path.station_list for path in path_list]
+    else:
+        if algo == 2:
+            paths = metro.find_possible_paths()
+        else:
+            paths = metro.get_shortest_path()
+        if not any(paths):
+            raise ValueError('No path from start to end.')
+        total_turn = predict_turns(split_train(metro.train_number, paths,
+                                               metro.cross_dictionary))
+    return algo, total_turn, [[station.position() for station in path]
+                              for path in paths]
+
+
+def get_lower_bound(metro):
+    """
+    Return a number of turns that no schedule can beat: the first train
+    needs the distance d from start to end and at most k trains arrive per
+    turn, k being the number of neighbours of the end station, so the last
+    one arrives at turn d + ceil(N / k) - 1 at the earliest.
+
+        @param: metro: main Map object of program
+        @return: int, None if the end station can not be reached
+    """
+    distance = {metro.start_station.uid: 0}
+    queue = deque([metro.start_station])
+    while queue and metro.end_station.uid not in distance:
+        station = queue.popleft()
+        for neighbour in metro.get_neighbours(station):
+            if neighbour.uid not in distance:
+                distance[neighbour.uid] = distance[station.uid] + 1
+                queue.append(neighbour)
+    if metro.end_station.uid not in distance:
+        return None
+    arrival_number = len(metro.get_neighbours(metro.end_station))
+    return distance[metro.end_station.uid]\
+        - (-metro.train_number // arrival_number) - 1
+
+
+def race(filename, metro):
+    """
+    Run all the strategies at the same time in worker processes and keep the
+    plan with the least total turns. The race stops as soon as a plan is
+    known to be optimal: the exact one, or one that reaches the lower bound.
+    Exit with an error if there is no path, or if a plan beats the lower
+    bound, which no valid plan can.
+
+        @param: filename: map file, loaded by every worker
+        @param: metro: main Map object of program
+        @return: algo (int), total turns (int), path_list: list of all paths
+                 with their trains
+    """
+    lower_bound = get_lower_bound(metro)
+    if lower_bound is None:
+        print_error_and_exit('path')
+    results = SimpleQueue()
+    best = None
+    with Pool(len(STRATEGIES), initializer=worker_metro.load_network,
+              initargs=(filename,)) as pool:
+        for algo in STRATEGIES:
+            pool.apply_async(run_strategy, (algo,), callback=results.put,
+                             error_callback=results.put)
+        for _ in STRATEGIES:
+            result = results.get()
+            # a strategy that failed does not take part in the race
+            if isinstance(result, BaseException):
+                continue
+            if result[1] < lower_bound:
+                print_error_and_exit('plan')
+            if best is None or (result[1], STRATEGIES.index(result[0]))\
+               < (best[1], STRATEGIES.index(best[0])):
+                best = result
+            if result[0] == 3 or best[1] <= lower_bound:
+                break
+        # leaving the block terminates the strategies still running
+    if best is None:
+        print_error_and_exit('path')
+    algo, total_turn, paths = best
+    station_lists = get_station_lists(metro, paths)
+    if algo == 3:
+        return algo, total_turn, create_exact_path_objects(
+            metro, station_lists, total_turn)
+    return algo, total_turn, get_path_object_list(metro, station_lists)
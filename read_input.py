@@ -1,8 +1,9 @@
 #!/usr/bin/env python3
 
 from base_metro import Line, Station
-from sys import stderr
+from sys import argv, stderr
 from argparse import ArgumentParser, RawDescriptionHelpFormatter
+from mmap import mmap, ACCESS_READ
 
 
 def analyze_single_line(line_data, cross_dictionary, special_data,
@@ -24,9 +25,8 @@ def analyze_single_line(line_data, cross_dictionary, special_data,
 
         current_line.station_list = station_list
         line_list.append(current_line)
-        # if line is circle, add the first and the last to their alter.
-        if station_list[0].name == station_list[-1].name:
-            station_list[0].add_alter(station_list[-1])
+        # if line is circle, keep a single station for the first and last.
+        current_line.fold_circle()
 
     def create_line(line_data):
         """
@@ -129,6 +129,36 @@ def analyze_single_line(line_data, cross_dictionary, special_data,
     return station_list, current_line
 
 
+def read_lines(fd):
+    """
+    Read the lines of a file without loading it whole: the file is memory
+    mapped and scanned for line breaks, or read line by line if it can not
+    be mapped (empty file, pipe).
+
+        @param: fd: file opened in binary mode
+        @return: generator of (begin, end, line_data): byte offsets of the
+                 line and of the next one, line without its line break
+                 (bytes)
+    """
+    try:
+        data = mmap(fd.fileno(), 0, access=ACCESS_READ)
+    except (ValueError, OSError):
+        begin = 0
+        for raw_line in fd:
+            yield begin, begin + len(raw_line), raw_line.rstrip(b'\r\n')
+            begin += len(raw_line)
+        return
+    with data:
+        begin = 0
+        size = len(data)
+        while begin < size:
+            end = data.find(b'\n', begin)
+            if end < 0:
+                end = size
+            yield begin, end + 1, data[begin:end].rstrip(b'\r')
+            begin = end + 1
+
+
 def analyze_all_data(filename):
     """
     Analyze data under graph data structure base on raw data.
@@ -143,15 +173,16 @@ def analyze_all_data(filename):
 
     def get_data():
         """
-        Get raw data under line by line format from file.
+        Get raw data line by line from file, without the empty lines.
 
-            @return: data: raw data under line by line format from file.
+            @return: data: generator of the lines of the file (str)
         """
 
         try:
-            fd = open(filename, 'r')
-            data = fd.read()
-            fd.close()
+            with open(filename, 'rb') as fd:
+                for _, _, line_data in read_lines(fd):
+                    if line_data:
+                        yield line_data.decode()
         except FileNotFoundError:
             print_error_and_exit('file')
         except PermissionError:
@@ -160,12 +191,6 @@ def analyze_all_data(filename):
             print_error_and_exit('dir')
         except UnicodeDecodeError:
             print_error_and_exit('data')
-        # Split data into lines
-        data = data.splitlines()
-        # Remove empty lines
-        while '' in data:
-            data.remove('')
-        return data
 
     # get data from file
     data = get_data()
@@ -200,7 +225,9 @@ def print_error_and_exit(error):
         'permission': 'Permission denied.',
         'data': 'Invalid file.',
         'dir': 'Can not read directory.',
-        'end': 'All the trains have reached the end station.'
+        'end': 'All the trains have reached the end station.',
+        'path': 'No path from start to end.',
+        'plan': 'Invalid plan.'
     }
     if error in error_messages:
         print(error_messages[error], file=stderr)
@@ -209,9 +236,19 @@ def print_error_and_exit(error):
     exit(1)
 
 
+def get_algo(value):
+    """
+    Convert the --algo argument: a number of algorithm or 'auto'.
+    """
+    if value == 'auto':
+        return value
+    return int(value)
+
+
 def take_input_args():
     '''
-    Take and return the filename and algorithm arguments from input.
+    Take and return the arguments from input: filename, algorithm and the
+    host and port to serve on if any.
     '''
     parser = ArgumentParser(
         description='The Delhi Metro network problem solver',
@@ -222,11 +259,76 @@ def take_input_args():
                 -------------------------------
                     1 (All trains follow one shortest way.)
                     2 (Divided trains into possible ways to optimize cost.)
+                    3 (Exact minimum turns, one train per station per turn.)
+                    auto (Race all of them, print the best plan.)
          ''')
     parser.add_argument('filename', action='store',
                         help='A file that contains a list of metro lines\
                         and metro stations. File must be format correctly.')
-    parser.add_argument('--algo', action='store', choices=[1, 2], type=int,
-                        default=2, help='The algorithm you choose to solve\
-                            the problem. Default 2')
-    return parser.parse_args().filename, parser.parse_args().algo
+    parser.add_argument('--algo', action='store',
+                        choices=[1, 2, 3, 'auto'], type=get_algo, default=2,
+                        help='The algorithm you choose to solve the problem,\
+                        auto runs them all and keeps the best. Default 2')
+    parser.add_argument('--fingerprint', action='store_true',
+                        help='Print the fingerprint of the plan (paths,\
+                        trains of every path and total turns) instead of\
+                        the turns.')
+    parser.add_argument('--format', action='store', default='text',
+                        choices=['text', 'jsonl', 'bin'],
+                        help='Output format of the turns. Default text')
+    parser.add_argument('--bounded', action='store_true',
+                        help='Only keep the trains between the start and\
+                        end stations in memory, needs --format jsonl or\
+                        bin.')
+    parser.add_argument('--lazy', action='store_true',
+                        help='Only parse the lines that the search reaches.')
+    parser.add_argument('--sweep', action='store', type=int, nargs=2,
+                        metavar=('FIRST', 'LAST'),
+                        help='Print the total turns for every number of\
+                        trains from FIRST to LAST instead of the turns.')
+    parser.add_argument('--max-trains', action='store', type=int,
+                        metavar='TURNS',
+                        help='Print the largest number of trains that reach\
+                        the end within TURNS turns instead of the turns.')
+    parser.add_argument('--timetable', action='store', metavar='FILE',
+                        help='Reuse the paths saved in FILE if they join the\
+                        same start and end stations, else search and save\
+                        them there, then print the plan of the number of\
+                        trains of the map from them.')
+    parser.add_argument('--analyze', action='store_true',
+                        help='Print the bottleneck stations of the map\
+                        (minimum cut, articulation points, betweenness and\
+                        the gain of more capacity) instead of the turns.')
+    parser.add_argument('--serve', action='store', type=int, metavar='PORT',
+                        help='Load the map once and answer route queries\
+                        (JSON lines) on this port instead of solving it.')
+    parser.add_argument('--host', action='store', default='127.0.0.1',
+                        help='Address to serve on. Default 127.0.0.1')
+    args = parser.parse_args()
+    if args.bounded and (args.format == 'text' or args.algo not in (1, 2)):
+        parser.error('--bounded needs --format jsonl or bin and algo 1 or 2')
+    if args.bounded and args.fingerprint:
+        parser.error('--bounded prints the turns, not a fingerprint')
+    if args.timetable and (args.bounded or args.algo not in (1, 2)):
+        parser.error('--timetable needs algo 1 or 2 and no --bounded')
+    if args.timetable and (args.sweep or args.max_trains is not None):
+        parser.error('--timetable prints a plan, not --sweep or'
+                     ' --max-trains')
+    if args.algo == 'auto' and (args.sweep or args.max_trains is not None):
+        parser.error('--sweep and --max-trains need algo 1, 2 or 3')
+    return args
+
+
+def take_verify_args():
+    '''
+    Take and return the map filename and schedule filename arguments of the
+    verify command.
+    '''
+    parser = ArgumentParser(
+        prog='metro_rush.py verify',
+        description='Check a schedule printed by metro_rush.py')
+    parser.add_argument('filename', action='store',
+                        help='The map file the schedule was made for.')
+    parser.add_argument('schedule', action='store',
+                        help='A file that contains the printed schedule.')
+    return parser.parse_args(argv[2:])
@@ -1,7 +1,15 @@
 #!/usr/bin/env python3
 
+from collections import deque, namedtuple
 from base_metro import Train, Path
 
+# State of every train after a turn: positions[order - 1] is the station
+# of the train 'T' + order.
+Snapshot = namedtuple('Snapshot', ['turn', 'positions'])
+# Trains that moved during a turn, every move is a Move.
+Changes = namedtuple('Changes', ['turn', 'moves'])
+Move = namedtuple('Move', ['train', 'source', 'target'])
+
 
 def print_train(train_list, metro):
     """
@@ -142,18 +150,23 @@ def get_next_step_for_all_train(busy_station_list, train_list, path):
     return train_list
 
 
-def change_position(busy_station_list, train_list, path):
+def change_position(busy_station_list, train_list, path, moves=None):
     """
     Take train, get the next step and turn position in to next step.
 
         @param: busy_station_list: list of busy stations
         @param: path: path from start to end
+        @param: moves: list to append a Move to for every train that moves
+                (default None)
         @param and return: train_list: list of trains
     """
     train_list = get_next_step_for_all_train(busy_station_list,
                                              train_list,
                                              path)
-    for index, _ in enumerate(train_list):
+    for index, train in enumerate(train_list):
+        if moves is not None and train.next_station != train.position:
+            moves.append(Move(train.order, train.position,
+                              train.next_station))
         train_list[index].position = train_list[index].next_station
     return train_list
 
@@ -185,18 +198,43 @@ def split_train(train_number, path_list, cross_dictionary):
                                   station keys
         @return: path_object_list: a list that content all Path's objects
     """
+    path_object_list = create_path_objects(path_list, cross_dictionary)
+    i = 1
+    while i < train_number + 1:
+        add_train(path_object_list)
+        i += 1
+    return path_object_list
+
+
+def create_path_objects(path_list, cross_dictionary):
+    """
+    Return a list of path objects without any train.
+
+        @param: path_list: list of all paths from start to end
+        @param: cross_dictionary: a dictionary with keys are station names and
+                                  values are all lines according to
+                                  station keys
+        @return: path_object_list: a list that content all Path's objects
+    """
     path_object_list = []
     for index, path in enumerate(path_list):
         path_object_list.append(Path(index,
                                      path,
                                      len(path) - 1,
                                      find_delta(path, cross_dictionary)))
-    i = 1
-    while i < train_number + 1:
-        path_object_list.sort(key=lambda path: path.cost)
-        path_object_list[0].cost += path_object_list[0].delta
-        path_object_list[0].train_number += 1
-        i += 1
+    return path_object_list
+
+
+def add_train(path_object_list):
+    """
+    Give one more train to the path with the lowest cost.
+
+        @param and return: path_object_list: a list of Path's objects, sorted
+                           by cost
+    """
+    path_object_list.sort(key=lambda path: path.cost)
+    path_object_list[0].cost += path_object_list[0].delta
+    path_object_list[0].train_number += 1
     return path_object_list
 
 
@@ -233,12 +271,14 @@ def get_path_object_list(metro, path_list):
     return path_list
 
 
-def move_the_train(path_list, metro):
+def move_the_train(path_list, metro, moves=None):
     """
     Change train's position in all path and return new path list for the
     print function to work.
 
         @param: metro: main Map object of program
+        @param: moves: list to append a Move to for every train that moves
+                (default None)
         @param and return: path_list: list of all paths
     """
     for index, path in enumerate(path_list):
@@ -246,5 +286,90 @@ def move_the_train(path_list, metro):
                                              metro.end_station)
         path_list[index].train_list\
             = change_position(busy_station_list, path_list[index].train_list,
-                              path.station_list)
+                              path.station_list, moves)
     return path_list
+
+
+def simulate(metro, path_list, changes_only=False):
+    """
+    Run the trains turn by turn and yield the state after every turn, until
+    all the trains have arrived at the end station.
+
+        @param: metro: main Map object of program
+        @param: path_list: list of all paths with their trains
+        @param: changes_only: yield only the trains that moved during the turn
+                (bool, default False)
+        @return: generator of Snapshot (turn, positions) or, if changes_only,
+                 of Changes (turn, moves)
+    """
+    all_train = get_all_train(path_list)
+    remain = 0
+    for train in all_train:
+        if train.position != metro.end_station:
+            remain += 1
+    turn = 0
+    while remain:
+        turn += 1
+        moves = []
+        path_list = move_the_train(path_list, metro, moves)
+        for move in moves:
+            if move.target == metro.end_station:
+                remain -= 1
+        if changes_only:
+            yield Changes(turn, tuple(moves))
+        else:
+            yield Snapshot(turn, tuple(train.position for train in all_train))
+
+
+def simulate_bounded(metro, path_list):
+    """
+    Run the trains turn by turn like simulate, but only create the trains
+    that have left the start station and forget them once they reach the end
+    station, so that memory depends on the length of the paths and not on
+    the number of trains. The rules are the same as in move_the_train: a
+    train does not move to a station that a train is in at the beginning of
+    the turn or that another train moves to during the turn, and the trains
+    waiting at the start station leave in order.
+
+        @param: metro: main Map object of program
+        @param: path_list: list of Path objects with their number of trains
+                and without train list (result of split_train)
+        @return: generator of Changes (turn, moves)
+    """
+    # for every path: next train to leave, last train + 1, trains on the way
+    # with their index in the path
+    dispatch_list = []
+    order = 1
+    for path in path_list:
+        dispatch_list.append([path, order, order + path.train_number,
+                              deque()])
+        order += path.train_number
+    remain = metro.train_number
+    turn = 0
+    while remain:
+        turn += 1
+        moves = []
+        for dispatch in dispatch_list:
+            path, next_order, last_order, on_way = dispatch
+            station_list = path.station_list
+            busy_station_list = set(train.position for train, _ in on_way)
+            for item in on_way:
+                train, index = item
+                next_station = station_list[index + 1]
+                if next_station not in busy_station_list:
+                    busy_station_list.add(next_station)
+                    moves.append(Move(train.order, train.position,
+                                      next_station))
+                    train.position = next_station
+                    item[1] = index + 1
+            # only the first waiting train can leave
+            if next_order < last_order and\
+               station_list[1] not in busy_station_list:
+                moves.append(Move(next_order, metro.start_station,
+                                  station_list[1]))
+                on_way.append([Train(station_list[1], next_order), 1])
+                dispatch[1] = next_order + 1
+            while on_way and on_way[0][0].position == metro.end_station:
+                on_way.popleft()
+                remain -= 1
+        yield Changes(turn, tuple(moves))
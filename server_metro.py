@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+import asyncio
+import json
+import socket
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from map_metro import Map
+from plan_metro import get_plan_fingerprint
+from read_input import analyze_all_data
+from run_metro import get_path_object_list, simulate
+import worker_metro
+
+
+def solve(start, end, trains, algo):
+    """
+    Solve a single query on the loaded network, run in a worker process.
+
+        @param: start: start station, line name + index (str)
+        @param: end: end station, line name + index (str)
+        @param: trains: number of trains (int)
+        @param: algo: algorithm to run, 1 or 2 (int)
+        @return: dictionary with total turns, the paths with their number
+                 of trains and the fingerprint of the plan, or with an error
+                 message
+    """
+    line_list, cross_dictionary, _ = worker_metro.network
+    special_data = {'START': start, 'END': end, 'TRAINS': trains}
+    try:
+        metro = Map(line_list, special_data, cross_dictionary)
+    except SystemExit:
+        return {'error': 'Invalid query.'}
+    if algo == 2:
+        paths = metro.find_possible_paths()
+    else:
+        paths = metro.get_shortest_path()
+    # the trains would never reach the end station
+    if not any(paths):
+        return {'error': 'No path from start to end.'}
+    path_list = get_path_object_list(metro, paths)
+    turns = 0
+    for turns, _ in simulate(metro, path_list, changes_only=True):
+        pass
+    return {'turns': turns,
+            'fingerprint': get_plan_fingerprint(path_list, turns),
+            'paths': [{'stations': [str(station)
+                                    for station in path.station_list],
+                       'trains': path.train_number}
+                      for path in path_list if path.train_number]}
+
+
+class MetroServer:
+    """
+    Answer route queries on a network loaded once, over a JSON line protocol.
+
+    Every request is a line with a JSON object {"start": ..., "end": ...,
+    "trains": ..., "algo": ...}, missing keys take their value from the map
+    file, or a JSON list of such objects answered as a batch. Every answer is
+    a line with the JSON result of the request (or list of results).
+
+    @method: __init__     : magic method, load the network and start the
+                            worker pool
+    @method: query        : answer a single request
+    @method: handle_client: answer all the requests of a connection
+    @method: serve        : listen on host and port until cancelled
+    """
+    def __init__(self, filename, workers=None, cache_size=1024, timeout=60):
+        """
+        Init magic method, load the network and start the worker pool.
+
+            @param and attribute: filename: map file
+            @param: workers: number of worker processes (int, default number
+                    of CPUs)
+            @param and attribute: cache_size: maximum number of cached
+                                  results (int)
+            @param and attribute: timeout: seconds to wait for a result
+                                  (default 60)
+            @attribute: special_data: default START, END and TRAINS
+            @attribute: pool: worker processes solving the queries
+            @attribute: cache: results of the last queries (OrderedDict)
+            @attribute: pending: queries being solved, shared by identical
+                        requests (dict)
+        """
+        self.filename = filename
+        _, _, self.special_data = analyze_all_data(filename)
+        self.pool = ProcessPoolExecutor(
+            workers, initializer=worker_metro.load_network,
+            initargs=(filename,))
+        self.cache_size = cache_size
+        self.timeout = timeout
+        self.cache = OrderedDict()
+        self.pending = {}
+
+    async def query(self, request):
+        """
+        Answer a single request, from the cache if already solved.
+
+            @param: request: dictionary with start, end, trains and algo
+            @return: result dictionary
+        """
+        try:
+            key = (str(request.get('start', self.special_data['START'])),
+                   str(request.get('end', self.special_data['END'])),
+                   int(request.get('trains', self.special_data['TRAINS'])),
+                   int(request.get('algo', 2)))
+        except (AttributeError, TypeError, ValueError):
+            return {'error': 'Invalid query.'}
+        if key[3] not in (1, 2):
+            return {'error': 'Invalid algo, 1 or 2 expected.'}
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            return self.cache[key]
+        # identical requests in progress wait for the same result
+        if key not in self.pending:
+            loop = asyncio.get_running_loop()
+            self.pending[key] = loop.run_in_executor(self.pool, solve, *key)
+            # a request that times out leaves the query running, the next
+            # identical ones keep waiting for it until it is solved
+            self.pending[key].add_done_callback(
+                lambda _: self.pending.pop(key, None))
+        try:
+            result = await asyncio.wait_for(asyncio.shield(self.pending[key]),
+                                            self.timeout)
+        except asyncio.TimeoutError:
+            return {'error': 'Query timed out.'}
+        except Exception as error:
+            return {'error': str(error)}
+        self.cache[key] = result
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return result
+
+    async def handle_client(self, reader, writer):
+        """
+        Answer all the requests of a connection, line by line.
+
+            @param: reader: stream reader of the connection
+            @param: writer: stream writer of the connection
+        """
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    result = {'error': 'Invalid JSON.'}
+                else:
+                    if isinstance(request, list):
+                        result = await asyncio.gather(
+                            *[self.query(item) for item in request])
+                    else:
+                        result = await self.query(request)
+                writer.write(json.dumps(result).encode() + b'\n')
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve(self, host, port):
+        """
+        Listen on host and port until cancelled.
+
+            @param: host: address to listen on
+            @param: port: port to listen on
+        """
+        server = await asyncio.start_server(self.handle_client, host, port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.pool.shutdown(cancel_futures=True)
+
+
+def run_server(filename, host, port):
+    """
+    Run the server until interrupted.
+
+        @param: filename: map file
+        @param: host: address to listen on
+        @param: port: port to listen on
+    """
+    try:
+        asyncio.run(MetroServer(filename).serve(host, port))
+    except KeyboardInterrupt:
+        pass
+
+
+def send_query(host, port, request):
+    """
+    Send a request to a running server and return its answer.
+
+        @param: host: address of the server
+        @param: port: port of the server
+        @param: request: dictionary (or list of dictionaries) to send
+        @return: answer of the server
+    """
+    with socket.create_connection((host, port)) as connection:
+        connection.sendall(json.dumps(request).encode() + b'\n')
+        with connection.makefile('rb') as answer:
+            return json.loads(answer.readline())
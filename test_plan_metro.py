@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+import unittest
+from os import listdir, path
+from random import Random
+from base_metro import Line, Station
+from map_metro import Map
+from plan_metro import Timetable, create_timetable
+from read_input import analyze_all_data
+from run_metro import split_train, find_delta
+
+TESTCASE = path.join(path.dirname(path.abspath(__file__)), 'testcase')
+
+
+def get_split(path_object_list):
+    """
+    Get the number of trains of every path and the path order of a result
+    of split_train, in the format of Timetable.split.
+
+        @param: path_object_list: result of split_train
+        @return: train_numbers, order
+    """
+    train_numbers = [0] * len(path_object_list)
+    for path_object in path_object_list:
+        train_numbers[path_object.index] = path_object.train_number
+    return train_numbers, [path_object.index
+                           for path_object in path_object_list]
+
+
+class TestSplit(unittest.TestCase):
+    """
+    Check that Timetable.split gives the trains like split_train does.
+
+    @method: test_random_paths: paths of random lengths and deltas
+    @method: test_testcase_maps: paths found on the maps of testcase
+    """
+    def test_random_paths(self):
+        """
+        Compare both on paths of random lengths, with or without a transfer
+        station, for 1 to 60 trains.
+        """
+        random = Random(7)
+        line = Line('Line')
+        for _ in range(300):
+            path_list = []
+            cross_dictionary = {}
+            for index in range(random.randint(1, 7)):
+                station_list = [Station(number, 'P{}S{}'.format(index, number),
+                                        line)
+                                for number in range(random.randint(2, 13))]
+                if random.random() < 0.5:
+                    cross_dictionary[station_list[-1].name] = ['Line']
+                path_list.append(station_list)
+            timetable = Timetable(
+                'network', 2, 'Line:0', 'Line:1',
+                [[station.position() for station in station_list]
+                 for station_list in path_list],
+                [find_delta(station_list, cross_dictionary)
+                 for station_list in path_list])
+            for train_number in range(1, 61):
+                self.assertEqual(
+                    timetable.split(train_number),
+                    get_split(split_train(train_number, path_list,
+                                          cross_dictionary)))
+
+    def test_testcase_maps(self):
+        """
+        Compare both on the paths that algorithms 1 and 2 find on every map
+        of testcase, for 1 to 100 trains.
+        """
+        for name in sorted(listdir(TESTCASE)):
+            line_list, cross_dictionary, special_data =\
+                analyze_all_data(path.join(TESTCASE, name))
+            metro = Map(line_list, special_data, cross_dictionary)
+            for path_list in (metro.get_shortest_path(),
+                              metro.find_possible_paths()):
+                timetable = create_timetable(metro, path_list, 'network', 2)
+                for train_number in range(1, 101):
+                    with self.subTest(map=name, trains=train_number):
+                        self.assertEqual(
+                            timetable.split(train_number),
+                            get_split(split_train(train_number, path_list,
+                                                  cross_dictionary)))
+
+
+if __name__ == '__main__':
+    unittest.main()
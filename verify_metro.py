@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+
+
+class ScheduleError(Exception):
+    """
+    Raised when a schedule breaks a rule of the metro.
+    """
+
+
+def verify_schedule(metro, schedule):
+    """
+    Check a schedule printed by metro_rush.py, reading it line by line: every
+    move is along a line or a cross, no station other than the start and end
+    ones holds more than one train and every train reaches the end station.
+
+        @param: metro: main Map object of program
+        @param: schedule: lines of the schedule (iterable of str)
+        @return: total turns (int)
+        @raise: ScheduleError: first broken rule found
+    """
+
+    def get_station(value):
+        """
+        Find station from its printed form, ex: 'Kashmere Gate(Red Line:8)'.
+
+            @param: value: printed station (str)
+            @return: station (object of class Station)
+        """
+        name, _, position = value[:-1].rpartition('(')
+        line_name, _, index = position.partition('&')[0].rpartition(':')
+        if line_name not in position_dict:
+            line = metro.get_line(line_name)
+            position_dict[line_name] = {}
+            if line:
+                for station in line.station_list:
+                    position_dict[line_name].setdefault(station.index,
+                                                        station)
+                    if station.alter_index is not None:
+                        position_dict[line_name].setdefault(
+                            station.alter_index, station)
+        try:
+            station = position_dict[line_name].get(int(index))
+        except ValueError:
+            station = None
+        if not station or station.name != name:
+            raise ScheduleError('Turn ' + str(turn) + ': unknown station '
+                                + value + '.')
+        return station
+
+    def check_move(train, station):
+        """
+        Check that a train can go from its position to station in one turn.
+
+            @param: train: train order (int)
+            @param: station: new position of the train
+        """
+        position = positions[train - 1]
+        if station == position:
+            return
+        if position.uid not in neighbour_dict:
+            neighbour_dict[position.uid] = set(
+                neighbour.uid for neighbour in metro.get_neighbours(position))
+        if station.uid not in neighbour_dict[position.uid]:
+            raise ScheduleError('Turn ' + str(turn) + ': T' + str(train)
+                                + ' can not move from ' + str(position)
+                                + ' to ' + str(station) + '.')
+
+    def check_turn(line_data):
+        """
+        Check the positions of all the trains after a turn and update them.
+
+            @param: line_data: printed turn, ex: 'A(L:1)-T2|B(L:2)-T1'
+        """
+        seen = set()
+        occupied = set()
+        for part in line_data.split('|'):
+            value, _, trains = part.rpartition(')-')
+            station = get_station(value + ')')
+            train_list = trains.split(',')
+            if station not in ends:
+                if station.uid in occupied or len(train_list) > 1:
+                    raise ScheduleError('Turn ' + str(turn) + ': more than'
+                                        ' one train in ' + str(station)
+                                        + '.')
+                occupied.add(station.uid)
+            for train in train_list:
+                try:
+                    train = int(train[1:])
+                except ValueError:
+                    train = 0
+                if not 0 < train <= len(positions) or train in seen:
+                    raise ScheduleError('Turn ' + str(turn) + ': invalid'
+                                        ' train ' + train_name(train) + '.')
+                seen.add(train)
+                check_move(train, station)
+                positions[train - 1] = station
+        if len(seen) != len(positions):
+            raise ScheduleError('Turn ' + str(turn) + ': missing trains.')
+
+    def train_name(train):
+        """
+        Return the printed name of a train order.
+        """
+        return 'T' + str(train)
+
+    end = metro.end_station
+    ends = (metro.start_station, end)
+    positions = [metro.start_station] * metro.train_number
+    position_dict = {}
+    neighbour_dict = {}
+    turn = 0
+    waiting_turn = False
+    total_turn = None
+    for line_data in schedule:
+        line_data = line_data.strip()
+        if not line_data:
+            continue
+        if waiting_turn:
+            check_turn(line_data)
+            waiting_turn = False
+        elif line_data.startswith('Turn:'):
+            turn += 1
+            if line_data != 'Turn: ' + str(turn):
+                raise ScheduleError('Turn ' + str(turn) + ' expected, got '
+                                    + line_data + '.')
+            waiting_turn = True
+        elif line_data.startswith('Total turn:'):
+            total_turn = line_data
+            break
+        else:
+            raise ScheduleError('Turn ' + str(turn) + ': unexpected line '
+                                + line_data + '.')
+    if total_turn != 'Total turn: ' + str(turn) or waiting_turn:
+        raise ScheduleError('Total turn: ' + str(turn) + ' expected.')
+    for train, position in enumerate(positions, 1):
+        if position != end:
+            raise ScheduleError(train_name(train) + ' does not reach '
+                                + str(metro.end_station) + '.')
+    return turn
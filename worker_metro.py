@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+from read_input import analyze_all_data
+
+# network loaded once in every worker process: line_list, cross_dictionary
+# and special_data of the map file.
+network = None
+
+
+def load_network(filename):
+    """
+    Load the network of the map file into the current worker process.
+
+        @param: filename: map file
+    """
+    global network
+    network = analyze_all_data(filename)